@@ -1,17 +1,19 @@
 """LIDAR API endpoints backed by Orion-LD entities."""
 
-import json
+import asyncio
 import logging
 import os
+import shutil
 import tempfile
 from typing import Any, Dict, List, Optional
-from uuid import uuid4
+from uuid import UUID, uuid4
 
 from botocore.exceptions import ClientError
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import PlainTextResponse, RedirectResponse, Response, StreamingResponse
-from pydantic import BaseModel, Field
-from redis import Redis
+from pydantic import BaseModel, Field, ValidationError
+from redis import BlockingConnectionPool, Redis
 from rq import Queue
 
 from prometheus_client import Histogram
@@ -21,14 +23,31 @@ from app.main import limiter
 from app.middleware.auth import get_tenant_id, require_auth
 from app.services.lidar_pipeline import process_lidar_job, process_uploaded_file
 from app.services.geodesy_validator import GeodesyValidationError, inspect_laz_crs
-from app.services.orion_client import get_orion_client
+from app.services.orion_client import OrionRequestError, get_orion_client
 from app.services.pnoa_indexer import PNOAIndexer
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
+
+# One Redis pool per API process, shared by every enqueue/cancel. Blocking
+# variant so threadpool bursts wait for a free connection instead of failing.
+_redis_pool = BlockingConnectionPool.from_url(settings.REDIS_URL, max_connections=32, timeout=5)
+_redis_queue: Optional[Queue] = None
+
 ALLOWED_CORS_ORIGINS = {o.strip() for o in settings.CORS_ORIGINS.split(",") if o.strip()}
 
+# Uploads are streamed to disk chunk by chunk; never hold the whole body.
+UPLOAD_MAX_BYTES = settings.UPLOAD_MAX_BYTES
+UPLOAD_CHUNK_BYTES = 1 << 20  # 1 MiB
+UPLOAD_PRESIGN_EXPIRES = 30 * 60  # seconds
+
+# Attribute projections for list endpoints: only what the responses serialize.
+LAYER_LIST_ATTRS = ["refAgriParcel", "resourceURL", "source", "pointCount", "dateObserved"]
+JOB_LIST_ATTRS = ["refAgriParcel", "status", "progress", "createdAt", "completedAt"]
+# Values the pipeline writes to DataProcessingJob.status
+JOB_STATUSES = frozenset({"queued", "processing", "completed", "failed", "cancelled"})
+
 # Prometheus metric: LiDAR processing job duration
 lidar_job_duration = Histogram(
     'lidar_job_duration_seconds',
@@ -88,6 +107,34 @@ class CoverageResponse(BaseModel):
     tiles: List[dict]
 
 
+class UploadPresignRequest(BaseModel):
+    """Request a presigned URL for a direct-to-storage upload."""
+    filename: str = Field(..., description="Original file name (.laz or .las)")
+
+
+class UploadPresignResponse(BaseModel):
+    """Presigned POST form for a direct-to-storage upload."""
+    upload_id: str
+    upload_url: str
+    fields: Dict[str, str] = Field(..., description="Form fields to send before the file part")
+    expires_in: int
+
+
+class UploadFinalizeRequest(BaseModel):
+    """Register a completed presigned upload as a processing job."""
+    upload_id: str = Field(..., description="upload_id returned by /upload/presign")
+    filename: str = Field(..., description="Same file name sent to /upload/presign")
+    parcel_id: str = Field(..., description="Parcel entity ID")
+    geometry_wkt: Optional[str] = Field(default=None, description="Optional WKT geometry for cropping")
+    config: ProcessingConfig = Field(default_factory=ProcessingConfig)
+    source_crs: Optional[str] = Field(default=None, description="Optional source CRS override (e.g. EPSG:25830+5782)")
+    classification_mode: Optional[str] = Field(
+        default="detect",
+        description="native=use file classes, auto=always recompute, detect=auto if missing"
+    )
+    has_rgb: Optional[bool] = Field(default=True, description="Whether the LAZ has RGB color data")
+
+
 class LayerResponse(BaseModel):
     """Response for point cloud layer."""
     id: str
@@ -103,15 +150,120 @@ class LayerResponse(BaseModel):
 # ============================================================================
 
 def get_redis_queue() -> Queue:
-    """Get RQ queue for job submission."""
-    redis_conn = Redis.from_url(settings.REDIS_URL)
-    return Queue(settings.WORKER_QUEUE_NAME, connection=redis_conn)
+    """Get RQ queue for job submission (backed by the shared connection pool)."""
+    global _redis_queue
+    if _redis_queue is None:
+        _redis_queue = Queue(settings.WORKER_QUEUE_NAME, connection=Redis(connection_pool=_redis_pool))
+    return _redis_queue
 
 
 def _prop(entity: Dict[str, Any], key: str, default: Any = None) -> Any:
     return entity.get(key, {}).get("value", default)
 
 
+# Blocking helpers (GeoJSON catalog, Redis, boto3). Endpoints that also await
+# Orion-LD dispatch these via run_in_threadpool; endpoints with no async work
+# are plain `def` so FastAPI runs them in its threadpool directly.
+
+def _find_coverage(geometry_wkt: str, source: Optional[str] = None) -> List[dict]:
+    # PNOAIndexer memoizes lookups per catalog version (path, mtime), so a
+    # rebuilt catalog is picked up immediately
+    return PNOAIndexer().find_coverage(geometry_wkt, source=source)
+
+
+def _has_coverage(geometry_wkt: str) -> bool:
+    # Existence check only; no result list is built or sorted
+    return PNOAIndexer().has_coverage(geometry_wkt)
+
+
+def _cancel_queued_rq_job(entity_id: str) -> None:
+    queue = get_redis_queue()
+    for rq_job in queue.get_jobs():
+        if rq_job.meta.get("job_entity_id") == entity_id:
+            rq_job.cancel()
+            break
+
+
+def _upload_extension(filename: Optional[str]) -> str:
+    """Validate an uploaded file name and return its lowercase extension."""
+    if not filename:
+        raise HTTPException(status_code=400, detail="No filename provided")
+    file_ext = filename.lower().split('.')[-1]
+    if file_ext not in ('laz', 'las'):
+        raise HTTPException(
+            status_code=400,
+            detail="Only .LAZ and .LAS files are supported"
+        )
+    return file_ext
+
+
+def _upload_key(tenant_id: str, job_id: str, file_ext: str) -> str:
+    return f"user_uploads/{tenant_id}/{job_id}/upload.{file_ext}"
+
+
+async def _queue_upload_job(
+    tenant_id: str,
+    user_id: str,
+    job_id: str,
+    parcel_id: str,
+    geometry_wkt: Optional[str],
+    s3_key: str,
+    config_payload: Dict[str, Any],
+) -> None:
+    """Create the Orion-LD job for an uploaded file and enqueue it for the worker."""
+    # RQ job id is chosen up front so the entity is written once, already
+    # carrying its queue reference.
+    rq_job_id = str(uuid4())
+    try:
+        job_entity_id = await get_orion_client(tenant_id).create_processing_job(
+            job_id=job_id,
+            parcel_id=parcel_id,
+            geometry_wkt=geometry_wkt,
+            config=config_payload,
+            user_id=user_id,
+            status_message=f"Queued RQ: {rq_job_id}",
+        )
+    except OrionRequestError as e:
+        # A concurrent finalize for the same upload_id created it first
+        if e.status_code == status.HTTP_409_CONFLICT:
+            raise HTTPException(status_code=409, detail="Upload already registered")
+        raise
+
+    try:
+        queue = get_redis_queue()
+        rq_job = await run_in_threadpool(
+            queue.enqueue,
+            process_uploaded_file,
+            job_entity_id,
+            tenant_id,
+            s3_key,
+            geometry_wkt,
+            job_id=rq_job_id,
+            job_timeout=settings.WORKER_TIMEOUT
+        )
+        logger.info(f"Upload job {job_entity_id} enqueued (RQ: {rq_job.id})")
+
+    except Exception as e:
+        logger.error(f"Failed to enqueue upload job: {e}")
+        await get_orion_client(tenant_id).update_job(
+            job_entity_id, status="failed", statusMessage=f"Failed to enqueue: {str(e)}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Processing queue unavailable. Please try again later."
+        )
+
+
+def _read_export_object(s3_key: str) -> bytes:
+    from app.services.storage import storage_service
+
+    response = storage_service.client.get_object(
+        Bucket=storage_service.bucket,
+        Key=s3_key,
+    )
+    return response["Body"].read()
+
+
 # ============================================================================
 # API Endpoints
 # ============================================================================
@@ -123,7 +275,7 @@ async def router_health():
 
 
 @router.get("/metrics")
-async def router_metrics():
+def router_metrics():
     """Public Prometheus metrics (reachable via ingress /api/lidar/metrics)."""
     from prometheus_client import generate_latest, REGISTRY
     return PlainTextResponse(
@@ -153,32 +305,35 @@ async def start_processing(
     logger.info(f"Processing request for parcel {body.parcel_id} by tenant {tenant_id}")
 
     # Check coverage first
-    indexer = PNOAIndexer()
-    if not indexer.has_coverage(body.parcel_geometry_wkt):
+    if not await run_in_threadpool(_has_coverage, body.parcel_geometry_wkt):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No LiDAR coverage available for this parcel"
         )
 
     job_id = str(uuid4())
+    rq_job_id = str(uuid4())
+    # statusMessage carries the RQ id (rqJobId would need its own @context term)
     job_entity_id = await get_orion_client(tenant_id).create_processing_job(
         job_id=job_id,
         parcel_id=body.parcel_id,
         geometry_wkt=body.parcel_geometry_wkt,
         config=body.config.model_dump(),
         user_id=current_user.get("sub", "unknown"),
+        status_message=f"Queued RQ: {rq_job_id}",
     )
     
     # Enqueue job for worker
     try:
         queue = get_redis_queue()
-        rq_job = queue.enqueue(
+        rq_job = await run_in_threadpool(
+            queue.enqueue,
             process_lidar_job,
             job_entity_id,
             tenant_id,
+            job_id=rq_job_id,
             job_timeout=settings.WORKER_TIMEOUT
         )
-        await get_orion_client(tenant_id).update_job(job_entity_id, statusMessage=f"Queued RQ: {rq_job.id}")
         logger.info(f"Job {job_entity_id} enqueued successfully (RQ: {rq_job.id})")
         
     except Exception as e:
@@ -221,13 +376,9 @@ async def cancel_processing(
         )
 
     # Remove from RQ queue if queued
-    if status in ("queued", "pending"):
+    if status == "queued":
         try:
-            queue = get_redis_queue()
-            for rq_job in queue.get_jobs():
-                if rq_job.meta.get("job_entity_id") == entity_id:
-                    rq_job.cancel()
-                    break
+            await run_in_threadpool(_cancel_queued_rq_job, entity_id)
         except Exception as e:
             logger.warning(f"Could not remove job from RQ queue: {e}")
 
@@ -265,17 +416,17 @@ async def get_job_status(
 
 
 @router.post("/coverage", response_model=CoverageResponse)
-async def check_coverage(
+def check_coverage(
     request: CoverageCheckRequest,
     current_user: dict = Depends(require_auth)
 ):
     """
     Check if LiDAR coverage is available for a given area.
     
-    Returns list of available tiles with their metadata.
+    Returns list of available tiles (full catalog properties are served by
+    /coverage/tiles/{tile_id}/metadata).
     """
-    indexer = PNOAIndexer()
-    tiles = indexer.find_coverage(request.geometry_wkt, source=request.source)
+    tiles = _find_coverage(request.geometry_wkt, request.source)
     
     return CoverageResponse(
         has_coverage=len(tiles) > 0,
@@ -283,6 +434,20 @@ async def check_coverage(
     )
 
 
+@router.get("/coverage/tiles/{tile_id}/metadata")
+def get_coverage_tile_metadata(
+    tile_id: str,
+    current_user: dict = Depends(require_auth)
+):
+    """
+    Get the full catalog properties of a coverage tile.
+    """
+    metadata = PNOAIndexer().get_tile_metadata(tile_id)
+    if metadata is None:
+        raise HTTPException(status_code=404, detail="Tile not found")
+    return metadata
+
+
 @router.get("/layers", response_model=List[LayerResponse])
 async def get_layers(
     parcel_id: Optional[str] = Query(None, description="Filter by parcel ID"),
@@ -292,7 +457,7 @@ async def get_layers(
     """
     Get available point cloud layers for the tenant.
     """
-    layers = await get_orion_client(tenant_id).list_assets(parcel_id=parcel_id)
+    layers = await get_orion_client(tenant_id).list_assets(parcel_id=parcel_id, attrs=LAYER_LIST_ATTRS)
     return [
         LayerResponse(
             id=l.get("id", "").split(":")[-1],
@@ -331,6 +496,16 @@ async def get_layer(
     )
 
 
+async def _delete_layer_trees(tenant_id: str, entity_id: str) -> None:
+    # Trees are supplementary to the layer; a failed cleanup must not fail
+    # the deletion after storage and the asset are already gone
+    try:
+        deleted = await get_orion_client(tenant_id).delete_asset_trees(entity_id)
+        logger.info(f"Deleted {deleted} AgriTree entities for {entity_id}")
+    except Exception as e:
+        logger.warning(f"Failed to delete AgriTree entities for {entity_id}: {e}")
+
+
 @router.delete("/layers/{layer_id}")
 async def delete_layer(
     layer_id: str,
@@ -340,7 +515,7 @@ async def delete_layer(
     """
     Delete a point cloud layer.
 
-    This also removes the tileset from storage.
+    This also removes the tileset from storage and the layer's AgriTree entities.
     """
     entity_id = f"urn:ngsi-ld:DigitalAsset:{layer_id}"
     try:
@@ -350,8 +525,12 @@ async def delete_layer(
 
     from app.services.storage import storage_service
     prefix = layer_id
-    storage_service.delete_prefix(prefix)
-    await get_orion_client(tenant_id).delete_asset(entity_id)
+    # Storage and entity deletion are independent; run them side by side
+    await asyncio.gather(
+        run_in_threadpool(storage_service.delete_prefix, prefix),
+        get_orion_client(tenant_id).delete_asset(entity_id),
+        _delete_layer_trees(tenant_id, entity_id),
+    )
 
     logger.info(f"Deleted layer {layer_id} for tenant {tenant_id}")
 
@@ -359,7 +538,7 @@ async def delete_layer(
 
 
 @router.get("/uploads")
-async def list_uploads(
+def list_uploads(
     current_user: dict = Depends(require_auth),
     tenant_id: str = Depends(get_tenant_id)
 ):
@@ -385,7 +564,7 @@ async def list_uploads(
 
 
 @router.delete("/uploads/{upload_id}")
-async def delete_upload(
+def delete_upload(
     upload_id: str,
     current_user: dict = Depends(require_auth),
     tenant_id: str = Depends(get_tenant_id)
@@ -414,12 +593,14 @@ async def list_jobs(
     """
     List processing jobs for the tenant.
     """
-    jobs = await get_orion_client(tenant_id).list_jobs(limit=limit, offset=offset)
-    if status_filter:
-        jobs = [j for j in jobs if _prop(j, "status") == status_filter]
-    if parcel_id:
-        jobs = [j for j in jobs if j.get("refAgriParcel", {}).get("object", "").endswith(parcel_id)]
-    
+    if status_filter is not None and status_filter not in JOB_STATUSES:
+        # No job can match an unknown status; skip the Orion-LD round-trip
+        return {"jobs": [], "total": 0, "limit": limit, "offset": offset}
+
+    jobs, total = await get_orion_client(tenant_id).list_jobs(
+        limit=limit, offset=offset, status=status_filter, parcel_id=parcel_id, attrs=JOB_LIST_ATTRS
+    )
+
     return {
         "jobs": [
             {
@@ -432,7 +613,7 @@ async def list_jobs(
             }
             for job in jobs
         ],
-        "total": len(jobs),
+        "total": total,
         "limit": limit,
         "offset": offset
     }
@@ -465,40 +646,26 @@ async def upload_laz_file(
     Maximum file size: 500MB.
     """
     # Validate file extension
-    if not file.filename:
-        raise HTTPException(status_code=400, detail="No filename provided")
-    
-    file_ext = file.filename.lower().split('.')[-1]
-    if file_ext not in ('laz', 'las'):
-        raise HTTPException(
-            status_code=400,
-            detail="Only .LAZ and .LAS files are supported"
-        )
+    file_ext = _upload_extension(file.filename)
     
-    # Parse config JSON
+    # Parse and validate config JSON; unknown keys are dropped
     try:
-        config_dict = json.loads(config) if config else {}
-    except json.JSONDecodeError:
-        config_dict = {}
+        processing_config = ProcessingConfig.model_validate_json(config or "{}")
+    except ValidationError:
+        processing_config = ProcessingConfig()
 
     # Save file to temp location, streaming in chunks to avoid loading into memory
-    max_size = 500 * 1024 * 1024
     temp_dir = tempfile.mkdtemp(prefix="lidar_upload_")
     temp_file_path = os.path.join(temp_dir, f"upload.{file_ext}")
+    job_id = str(uuid4())
+    s3_key = _upload_key(tenant_id, job_id, file_ext)
 
     try:
         bytes_written = 0
-        chunk_size = 1024 * 1024  # 1MB chunks
         with open(temp_file_path, 'wb') as f:
-            while True:
-                chunk = await file.read(chunk_size)
-                if not chunk:
-                    break
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
                 bytes_written += len(chunk)
-                if bytes_written > max_size:
-                    f.close()
-                    os.remove(temp_file_path)
-                    os.rmdir(temp_dir)
+                if bytes_written > UPLOAD_MAX_BYTES:
                     raise HTTPException(
                         status_code=413,
                         detail="File too large. Maximum size is 500MB."
@@ -506,98 +673,165 @@ async def upload_laz_file(
                 f.write(chunk)
         
         logger.info(f"Uploaded file saved to {temp_file_path} ({bytes_written} bytes)")
-        inspect_laz_crs(temp_file_path, source_crs_override=source_crs)
-        
-        job_id = str(uuid4())
+        await run_in_threadpool(inspect_laz_crs, temp_file_path, source_crs_override=source_crs)
         
         # Upload the file to MinIO temp location so the worker can download it
         from app.services.storage import storage_service
-        s3_key = f"user_uploads/{tenant_id}/{job_id}/upload.{file_ext}"
-        storage_service.ensure_bucket("lidar-source-tiles")
-        storage_service.upload_file(
+        await run_in_threadpool(storage_service.ensure_bucket, "lidar-source-tiles")
+        await run_in_threadpool(
+            storage_service.upload_file,
             bucket="lidar-source-tiles",
             key=s3_key,
             file_path=temp_file_path,
             content_type="application/octet-stream"
         )
         logger.info(f"Uploaded file stored in MinIO at lidar-source-tiles/{s3_key}")
-        
-        # Cleanup local API temp file immediately after upload to MinIO
-        try:
-            if os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
-            if os.path.exists(temp_dir):
-                os.rmdir(temp_dir)
-        except Exception as cleanup_err:
-            logger.warning(f"Failed to cleanup local temp file: {cleanup_err}")
-
-        config_payload = {
-            **config_dict,
-            "uploaded_file_path": s3_key,
-            "source": "user_upload",
-            "source_crs": source_crs,
-            "classification_mode": classification_mode,
-            "has_rgb": has_rgb,
-        }
-        job_entity_id = await get_orion_client(tenant_id).create_processing_job(
-            job_id=job_id,
-            parcel_id=parcel_id,
-            geometry_wkt=geometry_wkt,
-            config=config_payload,
-            user_id=current_user.get("sub", "unknown"),
+    except GeodesyValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    finally:
+        # The local copy is only needed until it is in MinIO (or the upload failed)
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    config_payload = {
+        **processing_config.model_dump(),
+        "uploaded_file_path": s3_key,
+        "source": "user_upload",
+        "source_crs": source_crs,
+        "classification_mode": classification_mode,
+        "has_rgb": has_rgb,
+    }
+    await _queue_upload_job(
+        tenant_id=tenant_id,
+        user_id=current_user.get("sub", "unknown"),
+        job_id=job_id,
+        parcel_id=parcel_id,
+        geometry_wkt=geometry_wkt,
+        s3_key=s3_key,
+        config_payload=config_payload,
+    )
+    
+    return ProcessResponse(
+        job_id=job_id,
+        status="queued",
+        message="File uploaded and queued for processing. Poll /status/{job_id} for updates."
+    )
+
+
+@router.post("/upload/presign", response_model=UploadPresignResponse)
+@limiter.limit("3 per minute")
+async def presign_upload(
+    request: Request,
+    body: UploadPresignRequest,
+    current_user: dict = Depends(require_auth),
+    tenant_id: str = Depends(get_tenant_id)
+):
+    """
+    Get a presigned URL to upload a LAZ/LAS file directly to storage.
+
+    The client POSTs a multipart form to `upload_url` with `fields` first
+    and the file last, then calls /upload/finalize with the returned
+    `upload_id` to queue processing. The file never passes through the API
+    process; the signed policy caps its size at 500MB.
+    """
+    from app.services.storage import storage_service
+
+    file_ext = _upload_extension(body.filename)
+    upload_id = str(uuid4())
+    s3_key = _upload_key(tenant_id, upload_id, file_ext)
+
+    # Browsers must reach the signed host; the internal endpoint is cluster-only
+    if not settings.MINIO_PUBLIC_BASE_URL:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Direct uploads are not configured; use /upload"
         )
-        
-        # Enqueue job for worker
-        try:
-            queue = get_redis_queue()
-            rq_job = queue.enqueue(
-                process_uploaded_file,
-                job_entity_id,
-                tenant_id,
-                s3_key,
-                geometry_wkt,
-                job_timeout=settings.WORKER_TIMEOUT
-            )
-            # Update statusMessage instead of rqJobId to avoid NGSI-LD context errors
-            await get_orion_client(tenant_id).update_job(job_entity_id, statusMessage=f"Queued RQ: {rq_job.id}")
-            logger.info(f"Upload job {job_entity_id} enqueued (RQ: {rq_job.id})")
-            
-        except Exception as e:
-            logger.error(f"Failed to enqueue upload job: {e}")
-            await get_orion_client(tenant_id).update_job(
-                job_entity_id, status="failed", statusMessage=f"Failed to enqueue: {str(e)}"
-            )
-
-            # Cleanup temp file
-            if os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
-            if os.path.exists(temp_dir):
-                os.rmdir(temp_dir)
-            
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Processing queue unavailable. Please try again later."
-            )
-        
+
+    await run_in_threadpool(storage_service.ensure_upload_bucket, "lidar-source-tiles")
+    post = await run_in_threadpool(
+        storage_service.presigned_post, "lidar-source-tiles", s3_key, UPLOAD_MAX_BYTES, UPLOAD_PRESIGN_EXPIRES
+    )
+    return UploadPresignResponse(
+        upload_id=upload_id,
+        upload_url=post["url"],
+        fields=post["fields"],
+        expires_in=UPLOAD_PRESIGN_EXPIRES,
+    )
+
+
+@router.post("/upload/finalize", response_model=ProcessResponse, status_code=status.HTTP_202_ACCEPTED)
+@limiter.limit("3 per minute")
+async def finalize_upload(
+    request: Request,
+    body: UploadFinalizeRequest,
+    current_user: dict = Depends(require_auth),
+    tenant_id: str = Depends(get_tenant_id)
+):
+    """
+    Queue processing for a file uploaded through /upload/presign.
+
+    CRS metadata is validated by the worker when it ingests the file
+    (the job fails with a CRS error instead of a 422 here).
+    Maximum file size: 500MB.
+    """
+    from app.services.storage import storage_service
+
+    file_ext = _upload_extension(body.filename)
+    try:
+        upload_id = str(UUID(body.upload_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid upload_id")
+    s3_key = _upload_key(tenant_id, upload_id, file_ext)
+
+    # Retried or double-submitted finalize: report the job already queued
+    try:
+        existing = await get_orion_client(tenant_id).get_job(f"urn:ngsi-ld:DataProcessingJob:{upload_id}")
+    except OrionRequestError as e:
+        if e.status_code != status.HTTP_404_NOT_FOUND:
+            raise
+    else:
         return ProcessResponse(
-            job_id=job_id,
-            status="queued",
-            message="File uploaded and queued for processing. Poll /status/{job_id} for updates."
+            job_id=upload_id,
+            status=_prop(existing, "status", "queued"),
+            message="Upload already registered. Poll /status/{job_id} for updates."
         )
-        
-    except GeodesyValidationError as e:
-        if os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
-        if os.path.exists(temp_dir):
-            os.rmdir(temp_dir)
-        raise HTTPException(status_code=422, detail=str(e))
-    except Exception as e:
-        # Cleanup on error
-        if os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
-        if os.path.exists(temp_dir):
-            os.rmdir(temp_dir)
-        raise
+
+    try:
+        size = await run_in_threadpool(storage_service.get_object_size, "lidar-source-tiles", s3_key)
+    except ClientError as e:
+        logger.error(f"Could not stat upload {s3_key}: {e}")
+        raise HTTPException(status_code=503, detail="Storage unavailable. Please try again later.")
+    if size is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if size > UPLOAD_MAX_BYTES:
+        await run_in_threadpool(
+            storage_service.delete_prefix,
+            f"user_uploads/{tenant_id}/{upload_id}/",
+            bucket="lidar-source-tiles",
+        )
+        raise HTTPException(status_code=413, detail="File too large. Maximum size is 500MB.")
+
+    config_payload = {
+        **body.config.model_dump(),
+        "uploaded_file_path": s3_key,
+        "source": "user_upload",
+        "source_crs": body.source_crs,
+        "classification_mode": body.classification_mode,
+        "has_rgb": body.has_rgb,
+    }
+    await _queue_upload_job(
+        tenant_id=tenant_id,
+        user_id=current_user.get("sub", "unknown"),
+        job_id=upload_id,
+        parcel_id=body.parcel_id,
+        geometry_wkt=body.geometry_wkt,
+        s3_key=s3_key,
+        config_payload=config_payload,
+    )
+    return ProcessResponse(
+        job_id=upload_id,
+        status="queued",
+        message="Upload registered and queued for processing. Poll /status/{job_id} for updates."
+    )
 
 
 # ============================================================================
@@ -616,7 +850,7 @@ TILESET_CONTENT_TYPES = {
 
 
 @router.get("/tilesets/{file_path:path}")
-async def serve_tileset_file(file_path: str, request: Request):
+def serve_tileset_file(file_path: str, request: Request):
     """
     Proxy endpoint that streams tileset files from MinIO.
 
@@ -735,15 +969,10 @@ async def export_derived_product(
         )
 
     # Stream from MinIO
-    from app.services.storage import storage_service
     s3_key = f"{layer_id}/{EXPORT_PRODUCTS[product][0]}"
 
     try:
-        response = storage_service.client.get_object(
-            Bucket=storage_service.bucket,
-            Key=s3_key,
-        )
-        content = response["Body"].read()
+        content = await run_in_threadpool(_read_export_object, s3_key)
     except Exception:
         raise HTTPException(
             status_code=404,
@@ -767,7 +996,7 @@ async def export_derived_product(
 # ============================================================================
 
 @router.get("/cache/stats")
-async def get_cache_stats(
+def get_cache_stats(
     user=Depends(require_auth)
 ):
     """
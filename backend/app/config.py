@@ -53,6 +53,15 @@ class Settings(BaseSettings):
     MAX_POINTS_BEFORE_TILING_DECIMATION: int = 4_000_000
     # Target point budget after decimation when guardrail is triggered.
     TILING_TARGET_POINTS: int = 2_500_000
+    # Write phase-to-phase point clouds as plain LAS instead of LAZ. Costs
+    # ~5-10x the disk space in work_dir but saves a LAZ entropy decode in
+    # every later phase. The exported classified cloud is still LAZ. Off by
+    # default: work_dir lives on node ephemeral storage, which the worker pod
+    # neither requests nor limits, so only enable it where disk is budgeted.
+    INTERMEDIATE_LAS_UNCOMPRESSED: bool = False
+    # Keep phase A's decoded points in memory for DTM/DSM generation when the
+    # cloud is at most this many points (~55 bytes/point). 0 disables.
+    IN_MEMORY_POINTS_MAX: int = 3_000_000
 
     # Extra LAS dimensions reserved for the eventual py3dtiles upgrade.
     # py3dtiles 7.0.0 (currently pinned) ignores anything beyond rgb and
@@ -68,6 +77,10 @@ class Settings(BaseSettings):
     WORKER_QUEUE_NAME: str = "lidar-processing"
     WORKER_TIMEOUT: int = 1800        # 30 min — RQ job_timeout
     PY3DTILES_TIMEOUT: int = 1500     # 25 min — subprocess.run timeout
+    # Worker processes per container, each taking one job at a time. Jobs
+    # are memory-bound (see the PY3DTILES_* budget below), so raise this only
+    # together with the pod memory limit; scaling pods is the default.
+    WORKER_CONCURRENCY: int = 1
 
     # py3dtiles defaults to os.cpu_count() workers and host_total_mem/10 of
     # cache, neither cgroup-aware. Cap to values compatible with the pod
@@ -76,6 +89,9 @@ class Settings(BaseSettings):
     PY3DTILES_JOBS: int = 4
     PY3DTILES_CACHE_SIZE_MB: int = 256
 
+    # Uploads (POST /upload); also enforced from Content-Length before parsing
+    UPLOAD_MAX_BYTES: int = 500 * 1024 * 1024
+
     # Security
     CORS_ORIGINS: str = "http://localhost:3000"
     PROJ_USER_WRITABLE_DIRECTORY: str = "/var/cache/proj"
@@ -2,11 +2,13 @@
 FastAPI main application for LIDAR module.
 """
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from pathlib import Path
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from prometheus_fastapi_instrumentator import Instrumentator
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
@@ -15,6 +17,9 @@ from redis import Redis
 import os
 
 from app.config import settings
+from app.middleware import auth
+from app.middleware.upload_limit import MULTIPART_OVERHEAD_BYTES, UploadSizeLimitMiddleware
+from app.services.orion_client import aclose_shared_client
 
 logger = logging.getLogger(__name__)
 
@@ -38,8 +43,20 @@ async def lifespan(app: FastAPI):
         )
     else:
         logger.info("Coverage index loaded from %s", coverage_path)
+
+    # Preload JWKS and keep it fresh so token checks stay in-memory
+    jwks_task = None
+    if auth.JWT_ISSUER:
+        try:
+            await auth.refresh_jwks()
+        except Exception as e:
+            logger.warning("JWKS preload failed, falling back to on-demand fetch: %s", e)
+        jwks_task = asyncio.create_task(auth.jwks_refresher())
     yield
     logger.info("Shutting down LIDAR Module API...")
+    if jwks_task:
+        jwks_task.cancel()
+    await aclose_shared_client()
 
 
 # Create FastAPI app
@@ -61,7 +78,15 @@ app = FastAPI(
     4. **Tiling**: Convert to 3D Tiles for web visualization
     """,
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+
+# Refuse oversized uploads from Content-Length before the multipart body is spooled
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_body_bytes=settings.UPLOAD_MAX_BYTES + MULTIPART_OVERHEAD_BYTES,
+    paths=["/api/lidar/upload"],
 )
 
 app.add_middleware(
@@ -2,12 +2,18 @@
 Authentication middleware for FastAPI.
 """
 
+import asyncio
 import logging
-from typing import Optional
+import threading
+import time
+from typing import Any, Dict, Optional
 from fastapi import Request, HTTPException, status, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from cachetools import TTLCache
+import httpx
 import jwt
-from jwt import PyJWKClient
+from jwt import PyJWKClient, PyJWKSet
 import os
 
 logger = logging.getLogger(__name__)
@@ -20,6 +26,21 @@ JWKS_URL = os.getenv('JWKS_URL', f'{JWT_ISSUER}/protocol/openid-connect/certs')
 # Cache for JWKS
 _jwks_client: Optional[PyJWKClient] = None
 
+# Signing keys by kid, loaded at startup and refreshed in the background so
+# token verification never waits on Keycloak. PyJWKClient is only used as a
+# fallback for a kid that appeared between refreshes.
+JWKS_REFRESH_INTERVAL = 600
+_signing_keys: Dict[str, Any] = {}
+
+# Verified payloads keyed by raw token: polling clients reuse the same bearer
+# token every second, so skip the JWKS lookup and RSA verify on repeats.
+# Entries are only served while the token is more than TOKEN_EXP_MARGIN
+# seconds away from expiry.
+TOKEN_CACHE_TTL = 60
+TOKEN_EXP_MARGIN = 30
+_token_cache: TTLCache = TTLCache(maxsize=4096, ttl=TOKEN_CACHE_TTL)
+_token_cache_lock = threading.Lock()
+
 security = HTTPBearer()
 
 
@@ -36,21 +57,62 @@ def get_jwks_client() -> PyJWKClient:
     return _jwks_client
 
 
+async def refresh_jwks() -> None:
+    """Fetch the JWKS and replace the in-memory signing key map."""
+    global _signing_keys
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        resp = await client.get(JWKS_URL)
+        resp.raise_for_status()
+    jwk_set = PyJWKSet.from_dict(resp.json())
+    _signing_keys = {
+        k.key_id: k.key
+        for k in jwk_set.keys
+        if k.key_id and k.public_key_use in (None, "sig")
+    }
+    logger.info(f"Loaded {len(_signing_keys)} JWKS signing keys")
+
+
+async def jwks_refresher(interval: int = JWKS_REFRESH_INTERVAL) -> None:
+    """Background task: refresh the JWKS every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await refresh_jwks()
+        except Exception as e:
+            logger.warning(f"JWKS refresh failed, keeping previous keys: {e}")
+
+
+async def _get_signing_key(token: str) -> Any:
+    kid = jwt.get_unverified_header(token).get("kid")
+    key = _signing_keys.get(kid) if kid else None
+    if key is not None:
+        return key
+    jwks_client = get_jwks_client()
+    signing_key = await run_in_threadpool(jwks_client.get_signing_key_from_jwt, token)
+    return signing_key.key
+
+
 async def verify_token(token: str) -> dict:
     """Verify JWT token and return payload."""
+    with _token_cache_lock:
+        cached = _token_cache.get(token)
+    if cached is not None and cached.get("exp", 0) > time.time() + TOKEN_EXP_MARGIN:
+        return dict(cached)
+
     try:
-        jwks_client = get_jwks_client()
-        signing_key = jwks_client.get_signing_key_from_jwt(token)
+        signing_key = await _get_signing_key(token)
 
         payload = jwt.decode(
             token,
-            signing_key.key,
+            signing_key,
             algorithms=[JWT_ALGORITHM],
             issuer=JWT_ISSUER,
             options={"verify_exp": True, "verify_iss": True}
         )
-        
-        return payload
+
+        with _token_cache_lock:
+            _token_cache[token] = payload
+        return dict(payload)
         
     except jwt.ExpiredSignatureError:
         logger.warning("Token has expired")
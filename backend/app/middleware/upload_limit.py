@@ -0,0 +1,37 @@
+"""
+Reject oversized uploads from the Content-Length header.
+
+FastAPI parses multipart bodies before the endpoint (or any dependency) runs,
+so a size check inside the route only fires after the whole file has been
+spooled. This ASGI middleware answers 413 before the body is read.
+"""
+
+from typing import Iterable
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# Slack on top of the file limit for multipart boundaries and form fields
+MULTIPART_OVERHEAD_BYTES = 1 << 20  # 1 MiB
+
+
+class UploadSizeLimitMiddleware:
+    def __init__(self, app: ASGIApp, max_body_bytes: int, paths: Iterable[str]):
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"] in self.paths:
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    try:
+                        declared = int(value)
+                    except ValueError:
+                        break
+                    if declared > self.max_body_bytes:
+                        response = JSONResponse({"detail": "File too large."}, status_code=413)
+                        await response(scope, receive, send)
+                        return
+                    break
+        await self.app(scope, receive, send)
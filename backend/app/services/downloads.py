@@ -0,0 +1,159 @@
+"""
+HTTP download helpers shared by the pipeline and the tile cache.
+
+Source tiles and NDVI rasters are hundreds of MB to several GB, so bodies
+are streamed straight to disk in large blocks over a pooled session.
+"""
+
+import errno
+import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_CHUNK_BYTES = 1 << 20  # 1 MiB
+# Files are fetched as RANGE_PART_BYTES ranges over up to
+# RANGE_DOWNLOAD_WORKERS connections
+RANGE_PART_BYTES = 16 << 20  # 16 MiB
+RANGE_DOWNLOAD_WORKERS = 8
+# Below this a single stream is as fast as splitting it up
+RANGE_DOWNLOAD_MIN_BYTES = 16 << 20  # 16 MiB
+
+# One pooled session per worker process; keeps connections to CNIG/MinIO alive
+# across downloads within the same job. The pool must hold every concurrent
+# range request; transient gateway errors are retried with backoff.
+_session = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=Retry(
+        total=5,
+        backoff_factor=0.3,
+        status_forcelist=[502, 503, 504],
+        raise_on_status=False,
+    ),
+)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+
+
+def stream_download(url: str, dst: str, timeout: float = 600, chunk_size: int = DOWNLOAD_CHUNK_BYTES) -> int:
+    """
+    Stream `url` to `dst` and return the number of bytes written.
+
+    The copy loop runs in C (shutil.copyfileobj over the raw socket)
+    instead of iterating `iter_content` chunks in Python.
+    """
+    with _session.get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        # Undo any transfer Content-Encoding; raw reads bypass requests' decoding
+        response.raw.decode_content = True
+        with open(dst, "wb") as f:
+            shutil.copyfileobj(response.raw, f, length=chunk_size)
+            return f.tell()
+
+
+class _RangeNotSupported(Exception):
+    pass
+
+
+def _download_range(url: str, fd: int, start: int, end: int, timeout: float) -> None:
+    headers = {"Range": f"bytes={start}-{end}"}
+    with _session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise _RangeNotSupported(f"server answered {response.status_code} to a Range request")
+        offset = start
+        while True:
+            buf = response.raw.read(DOWNLOAD_CHUNK_BYTES)
+            if not buf:
+                break
+            os.pwrite(fd, buf, offset)
+            offset += len(buf)
+    if offset != end + 1:
+        raise IOError(f"Short read for bytes {start}-{end}: got {offset - start} bytes")
+
+
+def _preallocate(fd: int, size: int) -> None:
+    # Reserve the blocks up front: parts land out of order, and running out
+    # of space should fail before the download rather than midway
+    if not hasattr(os, "posix_fallocate"):
+        os.ftruncate(fd, size)
+        return
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except OSError as e:
+        # Filesystem can't preallocate: just size the file. Anything else
+        # (ENOSPC in particular) is the early failure we want.
+        if e.errno not in (errno.EOPNOTSUPP, errno.EINVAL):
+            raise
+        os.ftruncate(fd, size)
+
+
+def _split_ranges(size: int, part_bytes: int) -> List[Tuple[int, int]]:
+    """Inclusive (start, end) byte ranges of at most `part_bytes` covering `size`."""
+    return [(start, min(start + part_bytes, size) - 1) for start in range(0, size, part_bytes)]
+
+
+def parallel_download(
+    url: str,
+    dst: str,
+    timeout: float = 600,
+    part_bytes: int = RANGE_PART_BYTES,
+    workers: int = RANGE_DOWNLOAD_WORKERS,
+) -> int:
+    """
+    Download `url` to `dst` as concurrent HTTP Range requests of
+    `part_bytes` each, over up to `workers` connections.
+
+    Each part is written at its offset in a preallocated file. Falls back to
+    a single stream when the size is unknown, the file is small, the server
+    does not advertise `Accept-Ranges: bytes`, or it ignores Range (answers
+    200 instead of 206).
+    """
+    try:
+        head = _session.head(url, allow_redirects=True, timeout=timeout)
+        head.raise_for_status()
+    except requests.RequestException as e:
+        # Some hosts reject HEAD (403/405) but serve GET
+        logger.info(f"HEAD failed ({e}); using a single stream")
+        return stream_download(url, dst, timeout=timeout)
+    size = int(head.headers.get("Content-Length") or 0)
+    accepts_ranges = head.headers.get("Accept-Ranges", "").lower() == "bytes"
+    if size < RANGE_DOWNLOAD_MIN_BYTES or workers < 2 or not accepts_ranges:
+        return stream_download(url, dst, timeout=timeout)
+
+    ranges = _split_ranges(size, part_bytes)
+    # Range answers must come from the final location, not a redirector
+    url = head.url
+
+    fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        _preallocate(fd, size)
+        pool = ThreadPoolExecutor(max_workers=min(workers, len(ranges)))
+        try:
+            futures = [pool.submit(_download_range, url, fd, start, end, timeout) for start, end in ranges]
+            for future in futures:
+                future.result()
+        finally:
+            # On a failed part, drop the queued ranges; running ones still
+            # finish before the file descriptor is closed
+            pool.shutdown(wait=True, cancel_futures=True)
+    except _RangeNotSupported as e:
+        logger.info(f"Range download unavailable ({e}); using a single stream")
+        os.close(fd)
+        fd = -1
+        return stream_download(url, dst, timeout=timeout)
+    finally:
+        if fd >= 0:
+            os.close(fd)
+
+    logger.info(f"Downloaded {size} bytes in {len(ranges)} ranges")
+    return size
@@ -11,6 +11,8 @@ import laspy
 import pdal
 import pyproj
 
+from app.services.pdal_utils import execute_pipeline
+
 
 @dataclass
 class GeodesyValidationResult:
@@ -37,7 +39,7 @@ def inspect_laz_crs(file_path: str, source_crs_override: Optional[str] = None) -
         raise GeodesyValidationError(f"CRS_INSPECTION_FAILED:{exc}") from exc
 
 
-def reproject_to_ecef(input_laz: str, output_laz: str, source_crs: str) -> None:
+def reproject_to_ecef(input_laz: str, output_laz: str, source_crs: str, compression: str = "laszip") -> None:
     try:
         pyproj.CRS.from_user_input(source_crs)
     except Exception as exc:
@@ -54,10 +56,10 @@ def reproject_to_ecef(input_laz: str, output_laz: str, source_crs: str) -> None:
             {
                 "type": "writers.las",
                 "filename": output_laz,
-                "compression": "laszip",
+                "compression": compression,
             },
         ]
     }
     env = os.environ.copy()
     env["PROJ_NETWORK"] = env.get("PROJ_NETWORK", "ON")
-    pdal.Pipeline(json.dumps(pipeline)).execute()
+    execute_pipeline(pdal.Pipeline(json.dumps(pipeline)))
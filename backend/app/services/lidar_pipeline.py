@@ -19,6 +19,8 @@ import shutil
 import json
 import struct
 import subprocess
+import threading
+from collections import deque
 from pathlib import Path
 from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
@@ -35,20 +37,104 @@ from shapely.ops import transform as shapely_transform
 from shapely.wkt import loads as wkt_loads
 import pyproj
 from scipy import ndimage
-from skimage.feature import peak_local_max
+from scipy.spatial import cKDTree
 from skimage.segmentation import watershed
-import requests
 
 from app.config import settings
 from app.services.geobounds_validator import GeoBoundsValidator
 from app.services.geodesy_validator import GeodesyValidationError, inspect_laz_crs, reproject_to_ecef
 from app.services.orion_client import get_orion_client
+from app.services.pdal_utils import execute_pipeline
 from app.services.pnoa_indexer import PNOAIndexer
 from app.services.storage import storage_service
 from app.services.tile_cache import tile_cache
 
 logger = logging.getLogger(__name__)
 
+# Lines of subprocess stderr kept for error messages
+STDERR_TAIL_LINES = 200
+
+
+def _stage_local_file(src: str, dst: str) -> None:
+    """
+    Make a local input available at `dst` without copying when possible.
+
+    Inputs are only read, so a hard link (same filesystem) or a symlink
+    is as good as a copy; fall back to copying only when both fail
+    (shutil.copy uses os.sendfile on Linux, so the copy stays in-kernel).
+    """
+    try:
+        os.link(src, dst)
+        return
+    except OSError:
+        pass
+    try:
+        os.symlink(os.path.abspath(src), dst)
+        return
+    except OSError:
+        pass
+    shutil.copy(src, dst)
+
+
+def _available_cpus() -> int:
+    """
+    CPUs this process can actually use: its affinity mask, further capped
+    by the cgroup CPU quota (a pod limit of 1000m still shows every host
+    core in the affinity mask).
+    """
+    cpus = len(os.sched_getaffinity(0))
+    try:
+        # cgroup v2: "<quota> <period>", quota is "max" when unlimited
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def _find_tree_tops(chm: np.ndarray, min_distance: int, threshold: float) -> np.ndarray:
+    """
+    Local maxima of the CHM as an (N, 2) array of (row, col), tallest first.
+
+    Same contract as skimage's peak_local_max defaults (square footprint of
+    2*min_distance+1, strict threshold, border excluded, no two peaks within
+    min_distance) but built on one separable maximum_filter pass instead of
+    its sort-based search. Flat-topped crowns yield a plateau of equal
+    maxima; one pixel is kept per plateau.
+    """
+    size = 2 * min_distance + 1
+    peaks = (ndimage.maximum_filter(chm, size=size, mode="nearest") == chm) & (chm > threshold)
+    if min_distance > 0:
+        peaks[:min_distance, :] = False
+        peaks[-min_distance:, :] = False
+        peaks[:, :min_distance] = False
+        peaks[:, -min_distance:] = False
+
+    plateaus, count = ndimage.label(peaks, structure=np.ones((3, 3), dtype=bool))
+    if count == 0:
+        return np.empty((0, 2), dtype=np.intp)
+    coordinates = np.array(
+        ndimage.maximum_position(chm, plateaus, np.arange(1, count + 1)), dtype=np.intp
+    )
+    order = np.argsort(-chm[coordinates[:, 0], coordinates[:, 1]], kind="stable")
+    coordinates = coordinates[order]
+
+    # Equal maxima that are not 8-connected (two crowns of the same height a
+    # few pixels apart) all survive the filter; keep the first of each group
+    # within min_distance (Chebyshev), as peak_local_max's spacing pass does.
+    if min_distance > 0 and len(coordinates) > 1:
+        neighbours = cKDTree(coordinates).query_ball_point(coordinates, r=min_distance, p=np.inf)
+        keep = np.ones(len(coordinates), dtype=bool)
+        for i, close in enumerate(neighbours):
+            if keep[i]:
+                for j in close:
+                    if j > i:
+                        keep[j] = False
+        coordinates = coordinates[keep]
+    return coordinates
+
 
 class LidarPipeline:
     """
@@ -68,6 +154,8 @@ class LidarPipeline:
         self.job_id = job_id
         self.tenant_id = tenant_id
         self.parcel_id = parcel_id
+        # One Orion-LD client (and keep-alive connection) for the whole job
+        self._orion = get_orion_client(tenant_id)
         self.work_dir = work_dir or tempfile.mkdtemp(prefix="lidar_")
         self.input_laz: Optional[str] = None
         self.cropped_laz: Optional[str] = None
@@ -77,6 +165,10 @@ class LidarPipeline:
         self.dtm_path: Optional[str] = None
         self.dsm_path: Optional[str] = None
         self.chm_path: Optional[str] = None
+        # Phase A output points, when small enough to keep for DTM/DSM
+        self._points: Optional[np.ndarray] = None
+        # CHM kept in memory for phase C: (array, transform, crs)
+        self._chm: Optional[Tuple[np.ndarray, Any, Any]] = None
         self.detected_trees: List[Dict[str, Any]] = []
         self.source_crs: Optional[str] = None
         self.bounds_validator = GeoBoundsValidator(
@@ -86,6 +178,26 @@ class LidarPipeline:
         
         # Ensure work directory exists
         Path(self.work_dir).mkdir(parents=True, exist_ok=True)
+
+    @property
+    def _intermediate_compression(self) -> str:
+        return "none" if settings.INTERMEDIATE_LAS_UNCOMPRESSED else "laszip"
+
+    def _intermediate_path(self, stem: str) -> str:
+        """Work-dir path for a point cloud handed between phases (.las or .laz)."""
+        ext = ".las" if settings.INTERMEDIATE_LAS_UNCOMPRESSED else ".laz"
+        return os.path.join(self.work_dir, stem + ext)
+
+    def _compress_for_export(self, las_path: str) -> str:
+        """Return a LAZ copy of an uncompressed intermediate, streamed in chunks."""
+        if not las_path.endswith(".las"):
+            return las_path
+        laz_path = las_path[:-4] + "_export.laz"
+        with laspy.open(las_path) as reader:
+            with laspy.open(laz_path, mode="w", header=reader.header, do_compress=True) as writer:
+                for points in reader.chunk_iterator(1_000_000):
+                    writer.write_points(points)
+        return laz_path
     
     def update_job_status(
         self,
@@ -105,7 +217,7 @@ class LidarPipeline:
         }
         if status in ("completed", "failed"):
             updates["completedAt"] = datetime.utcnow().isoformat() + "Z"
-        get_orion_client(self.tenant_id).update_job_sync(self.job_id, **updates)
+        self._orion.update_job_sync(self.job_id, **updates)
     
     def process(
         self,
@@ -126,8 +238,7 @@ class LidarPipeline:
         """
         try:
             logger.info(f"Starting pipeline for job {self.job_id}")
-            self.update_job_status("processing", 0, "Starting pipeline...")
-            
+
             # Phase A: Download and Crop
             self.update_job_status("processing", 10, "Downloading and cropping point cloud...")
             self.phase_a_ingest(laz_url, geometry_wkt, config.get("source_crs"))
@@ -206,28 +317,40 @@ class LidarPipeline:
             self.input_laz = tile_cache.get_or_download_tile(laz_url, self.work_dir)
             logger.info(f"Tile ready at: {self.input_laz}")
         else:
-            # Local file - just copy (user uploads)
+            # Local file (user uploads) - link it in rather than copy
             self.input_laz = os.path.join(self.work_dir, "input.laz")
-            shutil.copy(laz_url, self.input_laz)
+            _stage_local_file(laz_url, self.input_laz)
         validation = inspect_laz_crs(self.input_laz, source_crs_override=source_crs_override)
         self.source_crs = validation.source_crs
         
-        # Step 2: Build PDAL pipeline for crop + denoise
-        self.cropped_laz = os.path.join(self.work_dir, "cropped.laz")
-
-        stages = [
-            {"type": "readers.las", "filename": self.input_laz}
-        ]
+        # Step 2: Crop, then denoise. The crop is streamable, so it runs in
+        # fixed-size chunks over the full tile; the outlier/ELM filters are
+        # not, and only ever see the (much smaller) cropped set in memory.
+        self.cropped_laz = self._intermediate_path("cropped")
+        denoise_input = self.input_laz
 
-        # Crop to parcel geometry (if provided)
         if geometry_wkt and geometry_wkt.strip():
             crop_wkt = self._reproject_crop_polygon(geometry_wkt)
-            stages.append({
-                "type": "filters.crop",
-                "polygon": crop_wkt
-            })
+            parcel_laz = self._intermediate_path("parcel")
+            logger.info("Running PDAL crop pipeline")
+            crop_pipeline = pdal.Pipeline(json.dumps({"pipeline": [
+                {"type": "readers.las", "filename": self.input_laz},
+                {"type": "filters.crop", "polygon": crop_wkt},
+                {"type": "writers.las", "filename": parcel_laz,
+                 "compression": self._intermediate_compression},
+            ]}))
+            if execute_pipeline(crop_pipeline) > 0:
+                denoise_input = parcel_laz
+            else:
+                logger.warning(
+                    "No points remain after cropping to parcel boundary. "
+                    "The uploaded file does not overlap with the parcel. "
+                    "Falling back to processing the entire un-cropped file."
+                )
 
-        stages.extend([
+        logger.info("Running PDAL denoise pipeline")
+        pipeline = pdal.Pipeline(json.dumps({"pipeline": [
+            {"type": "readers.las", "filename": denoise_input},
             {
                 "type": "filters.outlier",
                 "method": "statistical",
@@ -240,27 +363,16 @@ class LidarPipeline:
             {
                 "type": "writers.las",
                 "filename": self.cropped_laz,
-                "compression": "laszip"
+                "compression": self._intermediate_compression
             }
-        ])
-
-        logger.info("Running PDAL crop + denoise pipeline")
-        pipeline = pdal.Pipeline(json.dumps({"pipeline": stages}))
+        ]}))
         count = pipeline.execute()
 
         if count == 0:
-            logger.warning(
-                "No points remain after cropping to parcel boundary. "
-                "The uploaded file does not overlap with the parcel. "
-                "Falling back to processing the entire un-cropped file."
-            )
-            # Remove the crop filter and run again
-            stages_no_crop = [s for s in stages if s.get("type") != "filters.crop"]
-            pipeline = pdal.Pipeline(json.dumps({"pipeline": stages_no_crop}))
-            count = pipeline.execute()
-            
-            if count == 0:
-                raise ValueError("The provided LAZ file contains 0 valid points even without cropping.")
+            raise ValueError("The provided LAZ file contains 0 valid points even without cropping.")
+
+        if count <= settings.IN_MEMORY_POINTS_MAX:
+            self._points = pipeline.arrays[0]
 
         logger.info(f"Phase A complete. {count} points. Output: {self.cropped_laz}")
 
@@ -275,18 +387,17 @@ class LidarPipeline:
         """
         logger.info("Phase B: Spectral fusion (NDVI)")
         
-        # Download NDVI raster
-        ndvi_path = os.path.join(self.work_dir, "ndvi.tif")
         if ndvi_raster_url.startswith(('http://', 'https://')):
-            response = requests.get(ndvi_raster_url, stream=True, timeout=120)
-            response.raise_for_status()
-            with open(ndvi_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            # GDAL reads remote rasters through /vsicurl/ with HTTP range
+            # requests, fetching only the blocks under the point cloud
+            # instead of downloading the whole mosaic. Retry/cache options
+            # are set once at worker startup (app.worker.GDAL_VSICURL_CONFIG).
+            ndvi_path = f"/vsicurl/{ndvi_raster_url}"
         else:
-            shutil.copy(ndvi_raster_url, ndvi_path)
+            ndvi_path = os.path.join(self.work_dir, "ndvi.tif")
+            _stage_local_file(ndvi_raster_url, ndvi_path)
         
-        self.colored_laz = os.path.join(self.work_dir, "colored.laz")
+        self.colored_laz = self._intermediate_path("colored")
         
         # Use PDAL colorization filter
         pipeline_json = {
@@ -303,7 +414,7 @@ class LidarPipeline:
                 {
                     "type": "writers.las",
                     "filename": self.colored_laz,
-                    "compression": "laszip",
+                    "compression": self._intermediate_compression,
                     "extra_dims": "NDVI=float"
                 }
             ]
@@ -311,7 +422,7 @@ class LidarPipeline:
         
         logger.info("Running PDAL colorization pipeline")
         pipeline = pdal.Pipeline(json.dumps(pipeline_json))
-        pipeline.execute()
+        execute_pipeline(pipeline)
         
         logger.info(f"Phase B complete. Output: {self.colored_laz}")
     
@@ -335,50 +446,47 @@ class LidarPipeline:
         # DTM filters to ground-only (Classification==2) which may cover less
         # area than the full cloud, producing a smaller raster.  Passing the
         # same explicit bounds to both writers guarantees identical dimensions.
-        bounds_pipeline = pdal.Pipeline(json.dumps({
-            "pipeline": [
-                {"type": "readers.las", "filename": source_laz},
-            ]
-        }))
-        bounds_pipeline.execute()
-        bounds_meta = bounds_pipeline.metadata
-        if isinstance(bounds_meta, str):
-            bounds_meta = json.loads(bounds_meta)
-        # PDAL metadata: readers.las → minx/miny/maxx/maxy
-        las_meta = bounds_meta.get("metadata", {})
-        minx = las_meta.get("minx", 0)
-        miny = las_meta.get("miny", 0)
-        maxx = las_meta.get("maxx", 0)
-        maxy = las_meta.get("maxy", 0)
+        # The LAS header already carries the extent, so no points are decoded.
+        with laspy.open(source_laz) as reader:
+            header = reader.header
+            minx, miny = header.mins[0], header.mins[1]
+            maxx, maxy = header.maxs[0], header.maxs[1]
         # PDAL bounds string: "([minx,maxx],[miny,maxy])"
         bounds_str = f"([{minx},{maxx}],[{miny},{maxy}])"
         logger.info(f"DTM/DSM bounds from source: {bounds_str}")
 
-        # DTM: ground-classified points interpolated to raster
-        pdal.Pipeline(json.dumps({
-            "pipeline": [
-                {"type": "readers.las", "filename": source_laz},
-                {"type": "filters.range", "limits": "Classification[2:2]"},
-                {"type": "writers.gdal", "filename": self.dtm_path,
-                 "resolution": resolution, "output_type": "idw",
-                 "bounds": bounds_str},
-            ]
-        })).execute()
-
-        # DSM: highest-return surface
-        pdal.Pipeline(json.dumps({
-            "pipeline": [
-                {"type": "readers.las", "filename": source_laz},
-                {"type": "writers.gdal", "filename": self.dsm_path,
-                 "resolution": resolution, "output_type": "max",
-                 "bounds": bounds_str},
-            ]
-        })).execute()
+        # One pipeline, one LAZ decode: the root feeds the DSM writer
+        # (highest-return surface) and, through the ground filter, the DTM
+        # writer (ground-classified points interpolated to raster).
+        # When phase A's points are still in memory (and phase B didn't
+        # rewrite them) they are fed in directly, skipping the decode; an
+        # array-fed pipeline needs a single non-reader root, hence the merge.
+        raster_stages = [
+            {"type": "writers.gdal", "inputs": ["cloud"], "filename": self.dsm_path,
+             "resolution": resolution, "output_type": "max",
+             "bounds": bounds_str},
+            {"type": "filters.range", "inputs": ["cloud"],
+             "limits": "Classification[2:2]", "tag": "ground"},
+            {"type": "writers.gdal", "inputs": ["ground"], "filename": self.dtm_path,
+             "resolution": resolution, "output_type": "idw",
+             "bounds": bounds_str},
+        ]
+        if self._points is not None and source_laz == self.cropped_laz:
+            stages = [{"type": "filters.merge", "tag": "cloud"}] + raster_stages
+            pipeline = pdal.Pipeline(json.dumps({"pipeline": stages}), arrays=[self._points])
+        else:
+            stages = [{"type": "readers.las", "filename": source_laz, "tag": "cloud"}] + raster_stages
+            pipeline = pdal.Pipeline(json.dumps({"pipeline": stages}))
+        pipeline.execute()
+        # Nothing downstream needs the raw points; release them before phase C/D
+        self._points = None
 
         # CHM = DSM - DTM
         with rasterio.open(self.dtm_path) as dtm_src, rasterio.open(self.dsm_path) as dsm_src:
-            dtm = dtm_src.read(1)
-            dsm = dsm_src.read(1)
+            # float32 halves the memory traffic for the whole CHM/segmentation
+            # chain; centimetre heights don't need float64.
+            dtm = dtm_src.read(1).astype(np.float32, copy=False)
+            dsm = dsm_src.read(1).astype(np.float32, copy=False)
             if dtm.shape != dsm.shape:
                 logger.error(
                     f"DTM/DSM shape mismatch after bounds alignment: "
@@ -388,12 +496,19 @@ class LidarPipeline:
                 raise RuntimeError(
                     f"DTM/DSM shape mismatch: DTM={dtm.shape} DSM={dsm.shape}"
                 )
+            # Clamp negatives and NaNs to 0 in place: fmax ignores the NaN operand
             chm = dsm - dtm
-            chm[chm < 0] = 0
-            chm[np.isnan(chm)] = 0
+            np.fmax(chm, 0, out=chm)
+            # Tiled + DEFLATE with the floating-point predictor: the CHM is
+            # only exported, so keep the file small rather than fast to seek.
             profile = dtm_src.profile.copy()
+            profile.update(
+                dtype="float32", tiled=True, blockxsize=256, blockysize=256,
+                compress="deflate", predictor=3,
+            )
             with rasterio.open(self.chm_path, 'w', **profile) as dst:
                 dst.write(chm, 1)
+            self._chm = (chm, dtm_src.transform, dtm_src.crs)
 
         logger.info("DTM/DSM/CHM generation complete")
 
@@ -407,7 +522,7 @@ class LidarPipeline:
         Phase C: Detect individual trees using CHM and watershed segmentation.
 
         Requires that _generate_dtm_dsm_chm() has already been called (the
-        CHM raster is reused from self.chm_path).
+        CHM is reused from memory, or from self.chm_path).
 
         Steps:
         1. Load pre-computed CHM
@@ -422,28 +537,27 @@ class LidarPipeline:
         """
         logger.info("Phase C: Tree segmentation")
 
-        if not self.chm_path or not os.path.exists(self.chm_path):
-            raise RuntimeError("CHM not found — _generate_dtm_dsm_chm() must run before tree segmentation")
-
-        # Load the pre-computed CHM
-        with rasterio.open(self.chm_path) as chm_src:
-            chm = chm_src.read(1)
-            transform = chm_src.transform
-            crs = chm_src.crs
-
-        # Apply minimum height threshold
-        chm_masked = np.where(chm >= min_height, chm, 0)
-        
-        # Smooth CHM slightly to reduce noise
-        chm_smooth = ndimage.gaussian_filter(chm_masked, sigma=1)
+        if self._chm is not None:
+            chm, transform, crs = self._chm
+        else:
+            if not self.chm_path or not os.path.exists(self.chm_path):
+                raise RuntimeError("CHM not found — _generate_dtm_dsm_chm() must run before tree segmentation")
+
+            # Load the pre-computed CHM
+            with rasterio.open(self.chm_path) as chm_src:
+                chm = chm_src.read(1)
+                transform = chm_src.transform
+                crs = chm_src.crs
+
+        # Apply minimum height threshold, then smooth slightly to reduce noise.
+        # The filter writes back into the thresholded buffer (separable 1-D
+        # passes are line-buffered), so no extra raster is allocated.
+        chm_smooth = np.where(chm >= min_height, chm, 0)
+        ndimage.gaussian_filter(chm_smooth, sigma=1, output=chm_smooth)
         
         # Find local maxima
         min_distance = int(search_radius / chm_resolution)
-        coordinates = peak_local_max(
-            chm_smooth,
-            min_distance=min_distance,
-            threshold_abs=min_height
-        )
+        coordinates = _find_tree_tops(chm_smooth, min_distance, min_height)
         
         logger.info(f"Found {len(coordinates)} potential tree tops")
         
@@ -485,16 +599,20 @@ class LidarPipeline:
         except Exception as e:
             logger.warning(f"Could not vectorize canopy polygons: {e}")
 
-        for idx, (row, col) in enumerate(coordinates, start=1):
-            # Get pixel coordinates in raster CRS
-            px_x = transform.c + col * transform.a
-            px_y = transform.f + row * transform.e
+        # Crown pixel counts for every label in one pass over the raster
+        crown_counts = np.bincount(labels.ravel(), minlength=len(coordinates) + 1)
+        # Peak pixel coordinates in raster CRS
+        rows, cols = coordinates[:, 0], coordinates[:, 1]
+        peak_xs = transform.c + cols * transform.a
+        peak_ys = transform.f + rows * transform.e
+        peak_heights = chm[rows, cols]
 
+        for idx, (px_x, px_y) in enumerate(zip(peak_xs.tolist(), peak_ys.tolist()), start=1):
             # Get tree height at peak
-            height = float(chm[row, col])
+            height = float(peak_heights[idx - 1])
 
-            # Get crown area (count pixels with this label)
-            crown_pixels = np.sum(labels == idx)
+            # Get crown area (pixels with this label)
+            crown_pixels = int(crown_counts[idx])
             crown_area = crown_pixels * (chm_resolution ** 2)  # m²
             crown_diameter = np.sqrt(crown_area / np.pi) * 2  # Approximate diameter
 
@@ -556,9 +674,12 @@ class LidarPipeline:
         logger.info("Phase D: 3D Tiling")
         
         source_laz = self.colored_laz or self.cropped_laz
-        self.reprojected_laz = os.path.join(self.work_dir, "reprojected_ecef.laz")
+        self.reprojected_laz = self._intermediate_path("reprojected_ecef")
         try:
-            reproject_to_ecef(source_laz, self.reprojected_laz, self.source_crs or "EPSG:4326")
+            reproject_to_ecef(
+                source_laz, self.reprojected_laz, self.source_crs or "EPSG:4326",
+                compression=self._intermediate_compression,
+            )
         except GeodesyValidationError:
             raise
         except Exception as exc:
@@ -595,32 +716,30 @@ class LidarPipeline:
         # py3dtiles defaults --jobs to os.cpu_count() (12 on this host) and
         # --cache_size to host_total_memory/10, neither of which respect the
         # pod cgroup limit. Combined with the resident RQ worker process
-        # they OOM-kill a 2 GiB pod mid-conversion. Cap both explicitly.
+        # they OOM-kill a 2 GiB pod mid-conversion. Cap both explicitly, and
+        # never ask for more workers than the CPUs (quota) this pod may use.
+        # The input was reprojected to ECEF above, so state the SRS rather
+        # than have py3dtiles probe the header for it.
+        jobs = min(settings.PY3DTILES_JOBS, _available_cpus())
         cmd = [
             py3dtiles_bin, "convert",
             source_laz,
             "--out", self.output_tiles_dir,
             "--overwrite",
             "--classification",
-            "--jobs", str(settings.PY3DTILES_JOBS),
+            "--jobs", str(jobs),
             "--cache_size", str(settings.PY3DTILES_CACHE_SIZE_MB),
+            "--srs_in", "4978",
         ]
         env = os.environ.copy()
         env["PATH"] = "/opt/conda/bin:" + env.get("PATH", "")
         env["PROJ_DATA"] = env.get("PROJ_DATA", "/opt/conda/share/proj")
         env["PROJ_LIB"] = env.get("PROJ_LIB", "/opt/conda/share/proj")
         logger.info(f"Running: {' '.join(cmd)}")
-        result = subprocess.run(
-            cmd,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.PIPE,
-            text=True,
-            timeout=settings.PY3DTILES_TIMEOUT,
-            env=env,
-        )
-        if result.returncode != 0:
-            logger.error(f"py3dtiles failed: {result.stderr}")
-            raise RuntimeError(f"py3dtiles conversion failed: {result.stderr}")
+        returncode, stderr_tail = self._run_streaming(cmd, env, settings.PY3DTILES_TIMEOUT)
+        if returncode != 0:
+            logger.error(f"py3dtiles failed: {stderr_tail}")
+            raise RuntimeError(f"py3dtiles conversion failed: {stderr_tail}")
 
         # Verify tileset.json was created
         tileset_path = os.path.join(self.output_tiles_dir, "tileset.json")
@@ -633,6 +752,40 @@ class LidarPipeline:
 
         logger.info(f"Phase D complete. Tiles at: {self.output_tiles_dir}")
     
+    @staticmethod
+    def _run_streaming(cmd: List[str], env: Dict[str, str], timeout: float) -> Tuple[int, str]:
+        """
+        Run a subprocess, streaming its stderr line by line.
+
+        Only the last STDERR_TAIL_LINES lines are kept for error reporting, so
+        memory stays flat however chatty the tool is. Raises
+        subprocess.TimeoutExpired (after killing the process) on timeout.
+        """
+        tail: deque = deque(maxlen=STDERR_TAIL_LINES)
+        timed_out = threading.Event()
+        proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, env=env)
+
+        def _kill():
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout, _kill)
+        timer.start()
+        try:
+            for raw in proc.stderr:
+                line = raw.decode("utf-8", "replace").rstrip()
+                if line:
+                    tail.append(line)
+                    logger.debug(line)
+            returncode = proc.wait()
+        finally:
+            timer.cancel()
+            proc.stderr.close()
+
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(cmd, timeout, stderr="\n".join(tail))
+        return returncode, "\n".join(tail)
+
     def _fix_tileset_bounding_volumes(self, tileset_path: str) -> None:
         """
         Post-process tileset.json to fix py3dtiles bounding volume bug.
@@ -786,10 +939,14 @@ class LidarPipeline:
             "chm": (self.chm_path, "image/tiff"),
             "classified_laz": (self.colored_laz or self.cropped_laz, "application/octet-stream"),
         }
+        classified = derived_files["classified_laz"][0]
+        if classified and os.path.exists(classified):
+            # Intermediates may be plain LAS; the published cloud stays LAZ
+            derived_files["classified_laz"] = (self._compress_for_export(classified), "application/octet-stream")
 
         for product_key, (local_path, content_type) in derived_files.items():
             if local_path and os.path.exists(local_path):
-                ext = os.path.splitext(local_path)[1] or (".tif" if product_key != "classified_laz" else ".laz")
+                ext = ".laz" if product_key == "classified_laz" else (os.path.splitext(local_path)[1] or ".tif")
                 s3_key = f"{prefix}/{product_key}{ext}"
                 storage_service.client.upload_file(
                     local_path,
@@ -825,7 +982,7 @@ class LidarPipeline:
             return source_laz
 
         step = max(2, math.ceil(point_count / target_points))
-        decimated_laz = os.path.join(self.work_dir, "tiling_input_decimated.laz")
+        decimated_laz = self._intermediate_path("tiling_input_decimated")
         logger.warning(
             "Adaptive decimation enabled for tiling: %s -> target~%s points (step=%s)",
             point_count,
@@ -837,10 +994,10 @@ class LidarPipeline:
             "pipeline": [
                 {"type": "readers.las", "filename": source_laz},
                 {"type": "filters.decimation", "step": step},
-                {"type": "writers.las", "filename": decimated_laz, "compression": "laszip"},
+                {"type": "writers.las", "filename": decimated_laz, "compression": self._intermediate_compression},
             ]
         }))
-        reduced_count = pipeline.execute()
+        reduced_count = execute_pipeline(pipeline)
         if reduced_count <= 0:
             raise RuntimeError(
                 "Adaptive decimation produced 0 points; refusing to continue tiling."
@@ -857,12 +1014,10 @@ class LidarPipeline:
         source = self.reprojected_laz or self.colored_laz or self.cropped_laz
         if not source or not os.path.exists(source):
             return 0
-        
-        pipeline = pdal.Pipeline(json.dumps({
-            "pipeline": [{"type": "readers.las", "filename": source}]
-        }))
-        pipeline.execute()
-        return pipeline.metadata.get('metadata', {}).get('readers.las', {}).get('count', 0)
+
+        # The LAS header carries the point count; no need to decompress points
+        with laspy.open(source) as reader:
+            return reader.header.point_count
 
     def _validate_bbox_is_europe(self, laz_path: str):
         with laspy.open(laz_path) as reader:
@@ -886,7 +1041,7 @@ class LidarPipeline:
           consume them via standard NGSI-LD queries.
         - AgriTree entities for detected trees (if any)
         """
-        client = get_orion_client(self.tenant_id)
+        client = self._orion
         asset_id = self.job_id.split(":")[-1]
         client.create_digital_asset_sync(
             asset_id=asset_id,
@@ -900,14 +1055,19 @@ class LidarPipeline:
             chm_url=upload_urls.get("chm"),
             classified_laz_url=upload_urls.get("classified_laz"),
         )
-        self.update_job_status(
-            "completed",
-            100,
-            f"Processed tileset: {upload_urls['tileset']}"
-        )
+        if self.detected_trees:
+            # Trees are supplementary to the asset; don't fail the job over them
+            try:
+                created = client.create_trees_batch_sync(asset_id, self.parcel_id, self.detected_trees)
+                logger.info(f"Created {created} AgriTree entities")
+            except Exception as e:
+                logger.warning(f"Failed to create AgriTree entities: {e}")
     
     def _cleanup(self):
         """Clean up temporary working directory."""
+        self._orion.close_sync()
+        # Background cache uploads read from work_dir
+        tile_cache.flush_uploads()
         try:
             if self.work_dir and os.path.exists(self.work_dir):
                 shutil.rmtree(self.work_dir)
@@ -1,11 +1,13 @@
 """Orion-LD client with async support for API handlers and sync fallback for worker/pipeline."""
 
+import asyncio
 import logging
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import quote
 
 import httpx
+import orjson
 import re
 import os
 
@@ -13,6 +15,53 @@ from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Entities per entityOperations request; keeps batch bodies bounded
+TREE_BATCH_SIZE = 500
+# Page size when querying AgriTree entities (Orion-LD maximum)
+TREE_QUERY_LIMIT = 1000
+# entityOperations/delete requests in flight per delete_asset_trees call
+TREE_DELETE_CONCURRENCY = 4
+
+# Shared by every OrionLDClient in the API process so requests reuse pooled
+# keep-alive connections; per-tenant headers are sent per request. HTTP/2 lets
+# concurrent requests multiplex over one connection where the Orion front-end
+# supports it (negotiated via ALPN, falls back to HTTP/1.1 otherwise).
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+class OrionRequestError(RuntimeError):
+    """Orion-LD answered with a non-success status (kept in `status_code`)."""
+
+    def __init__(self, status_code: int, text: str):
+        super().__init__(f"Orion request failed {status_code}: {text}")
+        self.status_code = status_code
+
+
+def _shared_async_client() -> httpx.AsyncClient:
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            http2=True,
+        )
+    return _async_client
+
+
+async def aclose_shared_client() -> None:
+    """Close the shared async client (called on API shutdown)."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+def _dumps(payload: Any) -> Optional[bytes]:
+    if payload is None:
+        return None
+    # Pipeline payloads can carry numpy scalars (e.g. tree crown sizes)
+    return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+
 
 def _make_headers(tenant_id: str) -> dict:
     n = tenant_id.lower().strip().replace('-', '_').replace(' ', '_')
@@ -49,9 +98,31 @@ class OrionLDClient:
         if settings.ORION_CONTEXT_URL:
             link_val = f'<{settings.ORION_CONTEXT_URL}>; rel="http://www.w3.org/ns/json-ld#context"; type="application/ld+json"'
             self.headers["Link"] = link_val
+        # Sync client kept open across calls so a worker job reuses one connection
+        self._sync_client: Optional[httpx.Client] = None
+
+    def _sync_http(self) -> httpx.Client:
+        if self._sync_client is None or self._sync_client.is_closed:
+            self._sync_client = httpx.Client(
+                timeout=30.0, limits=httpx.Limits(max_keepalive_connections=20)
+            )
+        return self._sync_client
 
-    async def _request(self, method: str, endpoint: str, json_data: Optional[Dict[str, Any]] = None) -> Any:
+    def close_sync(self) -> None:
+        """Close the persistent sync client (reopened on next use)."""
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
+
+    async def _request(self, method: str, endpoint: str, json_data: Optional[Any] = None) -> Any:
         """Async HTTP request to Orion-LD (used by API handlers)."""
+        resp = await self._send(method, endpoint, json_data)
+        if resp.content:
+            return orjson.loads(resp.content)
+        return None
+
+    async def _send(self, method: str, endpoint: str, json_data: Optional[Any] = None) -> httpx.Response:
+        """Async HTTP request returning the raw response (for header access)."""
         url = f"{self.base_url}{endpoint}"
 
         req_headers = dict(self.headers)
@@ -62,39 +133,40 @@ class OrionLDClient:
         elif json_data:
             req_headers["Content-Type"] = "application/json"
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.request(method, url, json=json_data, headers=req_headers)
-        if resp.status_code not in (200, 201, 204):
-            raise RuntimeError(f"Orion request failed {resp.status_code}: {resp.text}")
-        if resp.content:
-            return resp.json()
-        return None
+        resp = await _shared_async_client().request(method, url, content=_dumps(json_data), headers=req_headers)
+        # 207 Multi-Status: partial entityOperations results, parsed by the caller
+        if resp.status_code not in (200, 201, 204, 207):
+            raise OrionRequestError(resp.status_code, resp.text)
+        return resp
+
+    def _request_sync(self, method: str, endpoint: str, json_data: Optional[Any] = None) -> Any:
+        """Synchronous HTTP request to Orion-LD (used by worker/pipeline).
 
-    def _request_sync(self, method: str, endpoint: str, json_data: Optional[Dict[str, Any]] = None) -> Any:
-        """Synchronous HTTP request to Orion-LD (used by worker/pipeline)."""
+        `json_data` may be a list of entities for entityOperations batches.
+        """
         url = f"{self.base_url}{endpoint}"
 
         req_headers = dict(self.headers)
-        if json_data and "@context" in json_data:
+        first = json_data[0] if isinstance(json_data, list) and json_data else json_data
+        if first and "@context" in first:
             req_headers["Content-Type"] = "application/ld+json"
             if "Link" in req_headers:
                 del req_headers["Link"]
         elif json_data:
             req_headers["Content-Type"] = "application/json"
 
-        with httpx.Client(timeout=30.0) as client:
-            resp = client.request(method, url, json=json_data, headers=req_headers)
-        if resp.status_code not in (200, 201, 204):
-            raise RuntimeError(f"Orion request failed {resp.status_code}: {resp.text}")
+        resp = self._sync_http().request(method, url, content=_dumps(json_data), headers=req_headers)
+        if resp.status_code not in (200, 201, 204, 207):
+            raise OrionRequestError(resp.status_code, resp.text)
         if resp.content:
-            return resp.json()
+            return orjson.loads(resp.content)
         return None
 
     @staticmethod
     def _parcel_urn(parcel_id: str) -> str:
         return parcel_id if parcel_id.startswith("urn:") else f"urn:ngsi-ld:AgriParcel:{parcel_id}"
 
-    async def create_processing_job(self, job_id: str, parcel_id: str, geometry_wkt: Optional[str], config: Dict[str, Any], user_id: str) -> str:
+    async def create_processing_job(self, job_id: str, parcel_id: str, geometry_wkt: Optional[str], config: Dict[str, Any], user_id: str, status_message: str = "queued") -> str:
         entity_id = f"urn:ngsi-ld:DataProcessingJob:{job_id}"
         entity = {
             "@context": self.CONTEXT,
@@ -103,7 +175,7 @@ class OrionLDClient:
             "jobType": {"type": "Property", "value": "lidar"},
             "status": {"type": "Property", "value": "queued"},
             "progress": {"type": "Property", "value": 0},
-            "statusMessage": {"type": "Property", "value": "queued"},
+            "statusMessage": {"type": "Property", "value": status_message},
             "requestedBy": {"type": "Property", "value": user_id},
             "refAgriParcel": {"type": "Relationship", "object": self._parcel_urn(parcel_id)},
             "parcelGeometryWKT": {"type": "Property", "value": geometry_wkt or ""},
@@ -113,7 +185,7 @@ class OrionLDClient:
         await self._request("POST", "/ngsi-ld/v1/entities", entity)
         return entity_id
 
-    def create_processing_job_sync(self, job_id: str, parcel_id: str, geometry_wkt: Optional[str], config: Dict[str, Any], user_id: str) -> str:
+    def create_processing_job_sync(self, job_id: str, parcel_id: str, geometry_wkt: Optional[str], config: Dict[str, Any], user_id: str, status_message: str = "queued") -> str:
         """Synchronous version for worker/pipeline use."""
         entity_id = f"urn:ngsi-ld:DataProcessingJob:{job_id}"
         entity = {
@@ -123,7 +195,7 @@ class OrionLDClient:
             "jobType": {"type": "Property", "value": "lidar"},
             "status": {"type": "Property", "value": "queued"},
             "progress": {"type": "Property", "value": 0},
-            "statusMessage": {"type": "Property", "value": "queued"},
+            "statusMessage": {"type": "Property", "value": status_message},
             "requestedBy": {"type": "Property", "value": user_id},
             "refAgriParcel": {"type": "Relationship", "object": self._parcel_urn(parcel_id)},
             "parcelGeometryWKT": {"type": "Property", "value": geometry_wkt or ""},
@@ -153,11 +225,32 @@ class OrionLDClient:
         """Synchronous version for worker/pipeline use."""
         return self._request_sync("GET", f"/ngsi-ld/v1/entities/{quote(entity_id, safe='')}")
 
-    async def list_jobs(self, limit: int, offset: int) -> List[Dict[str, Any]]:
-        return (await self._request(
-            "GET",
-            f"/ngsi-ld/v1/entities?type=DataProcessingJob&q=jobType==\"lidar\"&limit={limit}&offset={offset}",
-        )) or []
+    async def list_jobs(
+        self,
+        limit: int,
+        offset: int,
+        status: Optional[str] = None,
+        parcel_id: Optional[str] = None,
+        attrs: Optional[List[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """List lidar jobs and the total match count in a single round trip.
+
+        Filters are evaluated by Orion-LD and the total comes from the
+        NGSILD-Results-Count header (count=true). ``attrs`` limits the
+        returned attributes to the ones the caller serializes.
+        """
+        q = 'jobType=="lidar"'
+        if status:
+            q += f';status=="{status}"'
+        if parcel_id:
+            q += f';refAgriParcel=="{self._parcel_urn(parcel_id)}"'
+        endpoint = f"/ngsi-ld/v1/entities?type=DataProcessingJob&q={q}&limit={limit}&offset={offset}&count=true"
+        if attrs:
+            endpoint += f"&attrs={','.join(attrs)}"
+        resp = await self._send("GET", endpoint)
+        jobs = (orjson.loads(resp.content) if resp.content else None) or []
+        total = int(resp.headers.get("NGSILD-Results-Count", offset + len(jobs)))
+        return jobs, total
 
     async def create_digital_asset(self, asset_id: str, parcel_id: str, tileset_url: str, source: str, point_count: int, tree_count: int, dtm_url: Optional[str] = None, dsm_url: Optional[str] = None, chm_url: Optional[str] = None, classified_laz_url: Optional[str] = None) -> str:
         entity_id = f"urn:ngsi-ld:DigitalAsset:{asset_id}"
@@ -212,11 +305,56 @@ class OrionLDClient:
         self._request_sync("POST", "/ngsi-ld/v1/entities", entity)
         return entity_id
 
-    async def list_assets(self, parcel_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    def _build_tree_entity(self, asset_id: str, parcel_urn: str, asset_urn: str, tree: Dict[str, Any]) -> Dict[str, Any]:
+        entity = {
+            "@context": self.CONTEXT,
+            "id": f"urn:ngsi-ld:AgriTree:{asset_id}:{tree['id']}",
+            "type": "AgriTree",
+            "location": {"type": "GeoProperty", "value": tree["location"]},
+            "height": {"type": "Property", "value": tree["height"]},
+            "crownDiameter": {"type": "Property", "value": tree["crown_diameter"]},
+            "crownArea": {"type": "Property", "value": tree["crown_area"]},
+            "refAgriParcel": {"type": "Relationship", "object": parcel_urn},
+            "refDigitalAsset": {"type": "Relationship", "object": asset_urn},
+        }
+        if tree.get("canopy_geometry"):
+            entity["canopyGeometry"] = {"type": "GeoProperty", "value": tree["canopy_geometry"]}
+        return entity
+
+    def create_trees_batch_sync(self, asset_id: str, parcel_id: str, trees: List[Dict[str, Any]]) -> int:
+        """Create AgriTree entities via entityOperations/create, TREE_BATCH_SIZE per request.
+
+        Returns the number of entities Orion reports as created.
+        """
+        parcel_urn = self._parcel_urn(parcel_id)
+        asset_urn = f"urn:ngsi-ld:DigitalAsset:{asset_id}"
+        created = 0
+        for start in range(0, len(trees), TREE_BATCH_SIZE):
+            batch = [
+                self._build_tree_entity(asset_id, parcel_urn, asset_urn, tree)
+                for tree in trees[start:start + TREE_BATCH_SIZE]
+            ]
+            result = self._request_sync("POST", "/ngsi-ld/v1/entityOperations/create", batch)
+            if isinstance(result, dict):
+                # 207 Multi-Status: {"success": [ids], "errors": [{"entityId", "error"}]}
+                errors = result.get("errors") or []
+                created += len(result.get("success") or [])
+                if errors:
+                    logger.warning(
+                        f"{len(errors)}/{len(batch)} AgriTree entities rejected, first: {errors[0]}"
+                    )
+            else:
+                created += len(batch)
+        return created
+
+    async def list_assets(self, parcel_id: Optional[str] = None, attrs: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         q = 'assetCategory=="LiDAR"'
         if parcel_id:
             q += f';refAgriParcel=="{self._parcel_urn(parcel_id)}"'
-        return (await self._request("GET", f"/ngsi-ld/v1/entities?type=DigitalAsset&q={q}&limit=1000")) or []
+        endpoint = f"/ngsi-ld/v1/entities?type=DigitalAsset&q={q}&limit=1000"
+        if attrs:
+            endpoint += f"&attrs={','.join(attrs)}"
+        return (await self._request("GET", endpoint)) or []
 
     async def get_asset(self, entity_id: str) -> Dict[str, Any]:
         return await self._request("GET", f"/ngsi-ld/v1/entities/{quote(entity_id, safe='')}")
@@ -224,6 +362,52 @@ class OrionLDClient:
     async def delete_asset(self, entity_id: str) -> None:
         await self._request("DELETE", f"/ngsi-ld/v1/entities/{quote(entity_id, safe='')}")
 
+    async def delete_asset_trees(self, asset_entity_id: str) -> int:
+        """Delete the AgriTree entities linked to a DigitalAsset via entityOperations/delete.
+
+        Returns the number of entities Orion reports as deleted.
+        """
+        q = f'refDigitalAsset=="{asset_entity_id}"'
+        sem = asyncio.Semaphore(TREE_DELETE_CONCURRENCY)
+
+        async def _delete_batch(batch: List[str]) -> int:
+            async with sem:
+                result = await self._request("POST", "/ngsi-ld/v1/entityOperations/delete", batch)
+            if isinstance(result, dict):
+                # 207 Multi-Status: {"success": [ids], "errors": [{"entityId", "error"}]}
+                errors = result.get("errors") or []
+                if errors:
+                    logger.warning(
+                        f"{len(errors)}/{len(batch)} AgriTree deletions rejected, first: {errors[0]}"
+                    )
+                return len(result.get("success") or [])
+            return len(batch)
+
+        deleted = 0
+        while True:
+            # Deleted entities drop out of the query, so always read the first page.
+            # Only ids are needed: project onto the (small) relationship every
+            # match has instead of pulling location/canopy geometries. NGSI-LD
+            # `attrs` also filters, so projecting on `id` would match nothing.
+            entities = await self._request(
+                "GET",
+                f"/ngsi-ld/v1/entities?type=AgriTree&q={q}&attrs=refDigitalAsset"
+                f"&options=keyValues&limit={TREE_QUERY_LIMIT}",
+            ) or []
+            if not entities:
+                break
+            ids = [e["id"] for e in entities]
+            counts = await asyncio.gather(*(
+                _delete_batch(ids[start:start + TREE_BATCH_SIZE])
+                for start in range(0, len(ids), TREE_BATCH_SIZE)
+            ))
+            page_deleted = sum(counts)
+            deleted += page_deleted
+            # Rejected entities stay in the query; re-reading would loop on them
+            if page_deleted < len(ids) or len(entities) < TREE_QUERY_LIMIT:
+                break
+        return deleted
+
     async def cancel_job(self, entity_id: str) -> None:
         payload = {
             "@context": self.CONTEXT,
@@ -0,0 +1,24 @@
+"""PDAL execution helpers."""
+
+import logging
+
+import pdal
+
+logger = logging.getLogger(__name__)
+
+# Points per chunk when a pipeline runs in streaming mode
+PDAL_STREAM_CHUNK_POINTS = 1_000_000
+
+
+def execute_pipeline(pipeline: pdal.Pipeline) -> int:
+    """
+    Execute a PDAL pipeline, streaming it in fixed-size chunks when every
+    stage supports it. Streaming keeps peak memory at one chunk instead of
+    the whole point cloud. Returns the number of points processed.
+
+    Streamed pipelines leave `pipeline.arrays` empty; callers that need the
+    points in memory should call `pipeline.execute()` directly.
+    """
+    if pipeline.streamable:
+        return pipeline.execute_streaming(chunk_size=PDAL_STREAM_CHUNK_POINTS)
+    return pipeline.execute()
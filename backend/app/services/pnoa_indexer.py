@@ -1,43 +1,90 @@
 """Coverage index service using read-only GeoJSON catalog."""
 
-import json
+import functools
 import logging
-from typing import Any, Dict, List, Optional
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
 
+import orjson
+from shapely import STRtree
 from shapely.geometry import shape
+from shapely.geometry.base import BaseGeometry
 from shapely.wkt import loads as wkt_loads
 
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# A catalog entry: the tile footprint, the fields returned by coverage
+# lookups, and the full feature properties (only served by get_tile_metadata)
+_Tile = Tuple[BaseGeometry, Dict[str, Any], Dict[str, Any]]
+
+
+class _Catalog(NamedTuple):
+    tiles: List[_Tile]
+    # R-tree over the tile footprints, in `tiles` order, so lookups only
+    # test the exact predicate against tiles whose bbox overlaps
+    tree: STRtree
+
+
+# Parsed catalog shared by all PNOAIndexer instances, keyed by (path, mtime)
+# so a rebuilt GeoJSON is picked up without a restart.
+_catalog_cache: Dict[Tuple[str, int], _Catalog] = {}
+
+# Repeated lookups for the same parcel (UI polling, job retries) skip the scan
+COVERAGE_MEMO_SIZE = 1024
+
+
+def _as_geometry(geometry: Union[str, BaseGeometry]) -> BaseGeometry:
+    return wkt_loads(geometry) if isinstance(geometry, str) else geometry
+
 
 class PNOAIndexer:
     def __init__(self):
-        self._tiles = self._load_tiles()
+        self._catalog_key: Optional[Tuple[str, int]] = None
+        self._catalog = self._cached_catalog()
+        self._tiles = self._catalog.tiles
+
+    def _cached_catalog(self) -> _Catalog:
+        path = settings.COVERAGE_INDEX_GEOJSON_PATH
+        try:
+            key = (path, os.stat(path).st_mtime_ns)
+        except OSError:
+            return _build_catalog(self._load_tiles())
+        self._catalog_key = key
+        catalog = _catalog_cache.get(key)
+        if catalog is None:
+            catalog = _build_catalog(self._load_tiles())
+            _catalog_cache.clear()
+            _memoized_matches.cache_clear()
+            _catalog_cache[key] = catalog
+        return catalog
 
-    def _load_tiles(self) -> List[Dict[str, Any]]:
+    def _load_tiles(self) -> List[_Tile]:
         try:
-            with open(settings.COVERAGE_INDEX_GEOJSON_PATH, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            # orjson parses national grids (10^5+ features) several times faster
+            with open(settings.COVERAGE_INDEX_GEOJSON_PATH, "rb") as f:
+                data = orjson.loads(f.read())
             features = data.get("features", [])
-            loaded: List[Dict[str, Any]] = []
+            loaded: List[_Tile] = []
             for feature in features:
                 props = feature.get("properties", {})
                 geom = feature.get("geometry")
                 if not geom:
                     continue
                 loaded.append(
-                    {
-                        "id": props.get("id") or props.get("tile_name") or "tile",
-                        "tile_name": props.get("tile_name", ""),
-                        "source": props.get("source", "PNOA"),
-                        "flight_year": props.get("flight_year"),
-                        "point_density": props.get("point_density"),
-                        "laz_url": props.get("laz_url"),
-                        "metadata": props,
-                        "_geometry": shape(geom),
-                    }
+                    (
+                        shape(geom),
+                        {
+                            "id": props.get("id") or props.get("tile_name") or "tile",
+                            "tile_name": props.get("tile_name", ""),
+                            "source": props.get("source", "PNOA"),
+                            "flight_year": props.get("flight_year"),
+                            "point_density": props.get("point_density"),
+                            "laz_url": props.get("laz_url"),
+                        },
+                        props,
+                    )
                 )
             return loaded
         except FileNotFoundError:
@@ -49,7 +96,7 @@ class PNOAIndexer:
     
     def find_coverage(
         self,
-        geometry_wkt: str,
+        geometry_wkt: Union[str, BaseGeometry],
         source: Optional[str] = None,
         srid: int = 4326
     ) -> List[Dict[str, Any]]:
@@ -57,39 +104,35 @@ class PNOAIndexer:
         Find LiDAR coverage tiles that intersect with the given geometry.
         
         Args:
-            geometry_wkt: WKT representation of the area of interest
+            geometry_wkt: WKT (or already-parsed shapely geometry) of the area of interest
             source: Optional filter by source (PNOA, IDENA, etc.)
             srid: SRID of the input geometry (default: 4326)
         
         Returns:
             List of coverage tiles with their metadata and LAZ URLs
         """
-        target = wkt_loads(geometry_wkt)
-        results: List[Dict[str, Any]] = []
-        for tile in self._tiles:
-            if source and tile["source"] != source:
-                continue
-            if tile["_geometry"].intersects(target):
-                results.append({k: v for k, v in tile.items() if k != "_geometry"})
-        results.sort(
-            key=lambda item: (
-                item.get("flight_year") or 0,
-                item.get("point_density") or 0,
-            ),
-            reverse=True,
-        )
-        return results
+        matches = None
+        if isinstance(geometry_wkt, str) and self._catalog_key in _catalog_cache:
+            try:
+                matches = _memoized_matches(self._catalog_key, geometry_wkt, source)
+            except KeyError:
+                # Catalog replaced by a reload in another thread
+                pass
+        if matches is None:
+            matches = _match_tiles(self._catalog, _as_geometry(geometry_wkt), source)
+        # Copy so callers can't mutate the shared catalog
+        return [dict(tile) for tile in matches]
     
-    def has_coverage(self, geometry_wkt: str, srid: int = 4326) -> bool:
+    def has_coverage(self, geometry_wkt: Union[str, BaseGeometry], srid: int = 4326) -> bool:
         """
         Quick check if any coverage exists for the geometry.
+        Only tiles whose bounding box overlaps are tested exactly.
         """
-        coverage = self.find_coverage(geometry_wkt, srid=srid)
-        return len(coverage) > 0
+        return self._catalog.tree.query(_as_geometry(geometry_wkt), predicate="intersects").size > 0
     
     def get_best_tile(
         self,
-        geometry_wkt: str,
+        geometry_wkt: Union[str, BaseGeometry],
         prefer_source: Optional[str] = None,
         srid: int = 4326
     ) -> Optional[Dict[str, Any]]:
@@ -113,5 +156,46 @@ class PNOAIndexer:
         
         return coverage[0] if coverage else None
     
+    def get_tile_metadata(self, tile_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Full catalog properties for a tile.
+
+        Coverage results carry only the scalar tile fields; the raw feature
+        properties are fetched separately when needed.
+        """
+        for _, tile, props in self._tiles:
+            if tile["id"] == tile_id:
+                return dict(props)
+        return None
+    
     def seed_from_shapefile(self, *args, **kwargs) -> int:
         raise RuntimeError("Shapefile seeding removed from runtime. Build GeoJSON catalog offline.")
+
+
+def _build_catalog(tiles: List[_Tile]) -> _Catalog:
+    return _Catalog(tiles, STRtree([footprint for footprint, _, _ in tiles]))
+
+
+def _match_tiles(catalog: _Catalog, geometry: BaseGeometry, source: Optional[str]) -> List[Dict[str, Any]]:
+    """Catalog tiles intersecting `geometry`, newest and densest first."""
+    # Catalog order breaks sort ties, as with a full scan
+    hits = sorted(catalog.tree.query(geometry, predicate="intersects").tolist())
+    results = [
+        tile
+        for tile in (catalog.tiles[i][1] for i in hits)
+        if not source or tile["source"] == source
+    ]
+    results.sort(
+        key=lambda item: (
+            item.get("flight_year") or 0,
+            item.get("point_density") or 0,
+        ),
+        reverse=True,
+    )
+    return results
+
+
+@functools.lru_cache(maxsize=COVERAGE_MEMO_SIZE)
+def _memoized_matches(catalog_key: Tuple[str, int], geometry_wkt: str, source: Optional[str]) -> Tuple[Dict[str, Any], ...]:
+    # Keyed on the catalog (path, mtime) so a rebuilt catalog misses
+    return tuple(_match_tiles(_catalog_cache[catalog_key], wkt_loads(geometry_wkt), source))
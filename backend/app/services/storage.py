@@ -6,9 +6,12 @@ Handles uploading and managing 3D Tiles and related assets.
 
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional, BinaryIO
 from pathlib import Path
+from types import MappingProxyType
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.client import Config
 from botocore.exceptions import ClientError
 
@@ -16,6 +19,41 @@ from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Concurrent object uploads in upload_directory. A tileset is thousands of
+# small .pnts files, so wall time is per-request latency, not bandwidth.
+UPLOAD_WORKERS = 32
+# Concurrent delete_objects calls (one per 1000-key page) in delete_prefix
+DELETE_WORKERS = 8
+# botocore's default pool (10) would make upload threads queue for a connection
+MAX_POOL_CONNECTIONS = 50
+
+_DEFAULT_CONTENT_TYPES = MappingProxyType({
+    '.json': 'application/json',
+    '.pnts': 'application/octet-stream',
+    '.b3dm': 'application/octet-stream',
+    '.i3dm': 'application/octet-stream',
+    '.cmpt': 'application/octet-stream',
+    '.glb': 'model/gltf-binary',
+    '.gltf': 'model/gltf+json',
+})
+
+_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    max_concurrency=16,
+    use_threads=True,
+)
+
+
+def _iter_files(root: str, relative: str = ''):
+    """Yield (path, key-style relative path) for every file under root."""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            rel = relative + entry.name
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_files(entry.path, rel + '/')
+            elif entry.is_file():
+                yield entry.path, rel
+
 
 class StorageService:
     """
@@ -27,21 +65,40 @@ class StorageService:
     - Generating public URLs for frontend
     """
     
+    # Buckets known to exist, shared by all instances. ensure_bucket runs on
+    # every upload request and TileCache construction; verify each bucket once
+    # per process instead of a head_bucket round trip each time.
+    _bucket_verified: set = set()
+    # Buckets whose browser-upload CORS rule was applied by this process
+    _upload_cors_applied: set = set()
+    
     def __init__(self):
         self.client = boto3.client(
             's3',
             endpoint_url=f"{'https' if settings.MINIO_SECURE else 'http'}://{settings.MINIO_ENDPOINT}",
             aws_access_key_id=settings.MINIO_ACCESS_KEY,
             aws_secret_access_key=settings.MINIO_SECRET_KEY,
-            config=Config(signature_version='s3v4'),
+            config=Config(
+                signature_version='s3v4',
+                max_pool_connections=MAX_POOL_CONNECTIONS,
+                # Pooled connections sit idle between jobs; keepalive lets the
+                # OS detect dead ones, and standard-mode retries cover
+                # the resets that slip through
+                tcp_keepalive=True,
+                retries={'max_attempts': 5, 'mode': 'standard'},
+            ),
             region_name='us-east-1'  # MinIO doesn't care, but boto3 needs it
         )
         self.bucket = settings.MINIO_BUCKET
+        # Client signed for the public MinIO host, created on first presign.
+        self._public_client = None
         self._ensure_bucket()
         self._sync_bucket_cors()
     
     def _ensure_bucket(self):
         """Ensure the bucket exists."""
+        if self.bucket in StorageService._bucket_verified:
+            return
         try:
             self.client.head_bucket(Bucket=self.bucket)
             logger.debug(f"Bucket {self.bucket} exists")
@@ -54,6 +111,7 @@ class StorageService:
                 self._set_public_read_policy()
             else:
                 raise
+        StorageService._bucket_verified.add(self.bucket)
     
     def _set_public_read_policy(self):
         """Set bucket policy to allow public read access."""
@@ -80,43 +138,65 @@ class StorageService:
         Apply strict browser CORS on the tileset bucket (no wildcard origins).
         Uses the same allowlist as FastAPI (CORS_ORIGINS).
         """
+        self._put_bucket_cors(self.bucket, {
+            "ID": "lidar-tilesets-browser",
+            "AllowedMethods": ["GET", "HEAD", "OPTIONS"],
+            "AllowedHeaders": [
+                "Range",
+                "If-None-Match",
+                "If-Modified-Since",
+                "Accept",
+                "Origin",
+                "Access-Control-Request-Method",
+                "Access-Control-Request-Headers",
+            ],
+            "ExposeHeaders": [
+                "ETag",
+                "Content-Length",
+                "Content-Range",
+                "Accept-Ranges",
+                "Last-Modified",
+            ],
+            "MaxAgeSeconds": 3600,
+        })
+
+    def _put_bucket_cors(self, bucket: str, rule: dict) -> None:
+        """Replace the bucket CORS config with `rule` for the CORS_ORIGINS allowlist."""
         origins = [o.strip() for o in settings.CORS_ORIGINS.split(",") if o.strip()]
         if not origins:
-            logger.warning("CORS_ORIGINS empty; skip MinIO CORS sync for bucket %s", self.bucket)
+            logger.warning("CORS_ORIGINS empty; skip MinIO CORS sync for bucket %s", bucket)
             return
         try:
             self.client.put_bucket_cors(
-                Bucket=self.bucket,
-                CORSConfiguration={
-                    "CORSRules": [
-                        {
-                            "ID": "lidar-tilesets-browser",
-                            "AllowedMethods": ["GET", "HEAD", "OPTIONS"],
-                            "AllowedOrigins": origins,
-                            "AllowedHeaders": [
-                                "Range",
-                                "If-None-Match",
-                                "If-Modified-Since",
-                                "Accept",
-                                "Origin",
-                                "Access-Control-Request-Method",
-                                "Access-Control-Request-Headers",
-                            ],
-                            "ExposeHeaders": [
-                                "ETag",
-                                "Content-Length",
-                                "Content-Range",
-                                "Accept-Ranges",
-                                "Last-Modified",
-                            ],
-                            "MaxAgeSeconds": 3600,
-                        },
-                    ],
-                },
+                Bucket=bucket,
+                CORSConfiguration={"CORSRules": [{**rule, "AllowedOrigins": origins}]},
             )
-            logger.info("MinIO bucket CORS applied for %s: %s", self.bucket, origins)
+            logger.info("MinIO bucket CORS applied for %s: %s", bucket, origins)
         except ClientError as exc:
-            logger.warning("MinIO put_bucket_cors failed for %s: %s", self.bucket, exc)
+            logger.warning("MinIO put_bucket_cors failed for %s: %s", bucket, exc)
+
+    def ensure_upload_bucket(self, bucket: str) -> None:
+        """
+        Ensure a bucket exists and accepts browser form uploads (presigned POST).
+
+        CORS is applied once per process, like the bucket check itself.
+        """
+        self.ensure_bucket(bucket)
+        if bucket in StorageService._upload_cors_applied:
+            return
+        self._put_bucket_cors(bucket, {
+            "ID": "lidar-uploads-browser",
+            "AllowedMethods": ["POST"],
+            "AllowedHeaders": [
+                "Content-Type",
+                "Origin",
+                "Access-Control-Request-Method",
+                "Access-Control-Request-Headers",
+            ],
+            "ExposeHeaders": ["ETag", "Location"],
+            "MaxAgeSeconds": 3600,
+        })
+        StorageService._upload_cors_applied.add(bucket)
     
     def upload_directory(
         self,
@@ -136,46 +216,49 @@ class StorageService:
             Public URL to the tileset.json
         """
         if content_type_map is None:
-            content_type_map = {
-                '.json': 'application/json',
-                '.pnts': 'application/octet-stream',
-                '.b3dm': 'application/octet-stream',
-                '.i3dm': 'application/octet-stream',
-                '.cmpt': 'application/octet-stream',
-                '.glb': 'model/gltf-binary',
-                '.gltf': 'model/gltf+json',
-            }
+            content_type_map = _DEFAULT_CONTENT_TYPES
         
         local_path = Path(local_dir)
         if not local_path.exists():
             raise FileNotFoundError(f"Directory not found: {local_dir}")
         
-        uploaded_files = []
+        # Walk with os.scandir (via _iter_files) rather than rglob: a tileset
+        # can hold 100k files and DirEntry reuses the stat from the listing
+        key_prefix = prefix.rstrip('/') + '/'
+        uploads = []
+        for file_path, relative in _iter_files(str(local_path)):
+            s3_key = key_prefix + relative
+            
+            # Determine content type
+            ext = os.path.splitext(relative)[1].lower()
+            content_type = content_type_map.get(ext, 'application/octet-stream')
+            uploads.append((file_path, s3_key, content_type))
         
-        for file_path in local_path.rglob('*'):
-            if file_path.is_file():
-                # Calculate relative path for S3 key
-                relative = file_path.relative_to(local_path)
-                s3_key = f"{prefix}/{relative}".replace('\\', '/')
-                
-                # Determine content type
-                ext = file_path.suffix.lower()
-                content_type = content_type_map.get(ext, 'application/octet-stream')
-                
-                # Upload file
-                logger.debug(f"Uploading {file_path} to {s3_key}")
-                self.client.upload_file(
-                    str(file_path),
-                    self.bucket,
-                    s3_key,
-                    ExtraArgs={'ContentType': content_type}
-                )
-                uploaded_files.append(s3_key)
+        # The boto3 client is thread-safe; upload files concurrently
+        uploaded_files = []
+        with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as pool:
+            futures = {
+                pool.submit(self._upload_one, file_path, s3_key, content_type): s3_key
+                for file_path, s3_key, content_type in uploads
+            }
+            for future in as_completed(futures):
+                future.result()
+                uploaded_files.append(futures[future])
         
         logger.info(f"Uploaded {len(uploaded_files)} files to {prefix}")
         tileset_key = f"{prefix}/tileset.json".replace("\\", "/")
         return self.get_public_url(tileset_key)
     
+    def _upload_one(self, file_path: str, s3_key: str, content_type: str) -> None:
+        logger.debug(f"Uploading {file_path} to {s3_key}")
+        self.client.upload_file(
+            file_path,
+            self.bucket,
+            s3_key,
+            ExtraArgs={'ContentType': content_type},
+            Config=_TRANSFER_CONFIG,
+        )
+    
     def delete_prefix(self, prefix: str, bucket: str = None) -> int:
         """
         Delete all objects under a prefix (folder).
@@ -190,18 +273,23 @@ class StorageService:
         target_bucket = bucket or self.bucket
         paginator = self.client.get_paginator('list_objects_v2')
 
+        # Listing is sequential (continuation tokens), but each page's
+        # delete_objects (up to 1000 keys) runs in the pool while the next
+        # page is listed.
         deleted_count = 0
-        for page in paginator.paginate(Bucket=target_bucket, Prefix=prefix):
-            if 'Contents' not in page:
-                continue
-
-            objects = [{'Key': obj['Key']} for obj in page['Contents']]
-            if objects:
-                self.client.delete_objects(
-                    Bucket=target_bucket,
-                    Delete={'Objects': objects}
-                )
-                deleted_count += len(objects)
+        with ThreadPoolExecutor(max_workers=DELETE_WORKERS) as pool:
+            futures = []
+            for page in paginator.paginate(Bucket=target_bucket, Prefix=prefix):
+                objects = [{'Key': obj['Key']} for obj in page.get('Contents', [])]
+                if objects:
+                    futures.append(pool.submit(
+                        self.client.delete_objects,
+                        Bucket=target_bucket,
+                        Delete={'Objects': objects, 'Quiet': True}
+                    ))
+                    deleted_count += len(objects)
+            for future in futures:
+                future.result()
 
         logger.info(f"Deleted {deleted_count} objects from {prefix}")
         return deleted_count
@@ -245,6 +333,8 @@ class StorageService:
     
     def ensure_bucket(self, bucket: str):
         """Ensure a specific bucket exists (for source tiles cache)."""
+        if bucket in StorageService._bucket_verified:
+            return
         try:
             self.client.head_bucket(Bucket=bucket)
             logger.debug(f"Bucket {bucket} exists")
@@ -255,6 +345,7 @@ class StorageService:
                 self.client.create_bucket(Bucket=bucket)
             else:
                 raise
+        StorageService._bucket_verified.add(bucket)
     
     def download_file(self, bucket: str, key: str, local_path: str):
         """
@@ -275,7 +366,9 @@ class StorageService:
         key: str = None,
         file_path: str = None,
         file_obj: 'BinaryIO' = None,
-        content_type: str = 'application/octet-stream'
+        content_type: str = 'application/octet-stream',
+        part_size: Optional[int] = None,
+        max_concurrency: int = 10
     ) -> str:
         """
         Upload a file to storage.
@@ -286,25 +379,37 @@ class StorageService:
             file_path: Local file path to upload (use this OR file_obj)
             file_obj: File-like object to upload (use this OR file_path)
             content_type: MIME type of the file
+            part_size: Multipart part size in bytes; smaller files go in a
+                single PUT (default: boto3's 8 MiB threshold and parts)
+            max_concurrency: Parts uploaded in parallel when part_size is set
         
         Returns:
             Public URL to the file
         """
         target_bucket = bucket or self.bucket
+        transfer_config = None
+        if part_size:
+            transfer_config = TransferConfig(
+                multipart_threshold=part_size,
+                multipart_chunksize=part_size,
+                max_concurrency=max_concurrency,
+            )
         
         if file_path:
             self.client.upload_file(
                 file_path,
                 target_bucket,
                 key,
-                ExtraArgs={'ContentType': content_type}
+                ExtraArgs={'ContentType': content_type},
+                Config=transfer_config
             )
         elif file_obj:
             self.client.upload_fileobj(
                 file_obj,
                 target_bucket,
                 key,
-                ExtraArgs={'ContentType': content_type}
+                ExtraArgs={'ContentType': content_type},
+                Config=transfer_config
             )
         else:
             raise ValueError("Either file_path or file_obj must be provided")
@@ -335,6 +440,54 @@ class StorageService:
         except ClientError:
             return False
 
+    def get_object_size(self, bucket: str, key: str) -> Optional[int]:
+        """Return the object size in bytes, or None if it does not exist."""
+        try:
+            return self.client.head_object(Bucket=bucket, Key=key)["ContentLength"]
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code', '') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    def presigned_post(self, bucket: str, key: str, max_bytes: int, expires_in: int = 1800) -> dict:
+        """
+        Generate a presigned POST so browsers can upload straight to MinIO.
+
+        The signed policy carries a content-length-range condition, so storage
+        rejects bodies over `max_bytes` before they are written. When
+        MINIO_PUBLIC_BASE_URL is set the form is signed for that host,
+        otherwise for the internal endpoint.
+
+        Args:
+            bucket: Target bucket
+            key: Target object key
+            max_bytes: Largest accepted object size
+            expires_in: Policy validity in seconds
+
+        Returns:
+            Dict with the form action `url` and the `fields` to send before the file
+        """
+        return self._presign_client().generate_presigned_post(
+            Bucket=bucket,
+            Key=key,
+            Conditions=[["content-length-range", 1, max_bytes]],
+            ExpiresIn=expires_in,
+        )
+
+    def _presign_client(self):
+        if not settings.MINIO_PUBLIC_BASE_URL:
+            return self.client
+        if self._public_client is None:
+            self._public_client = boto3.client(
+                's3',
+                endpoint_url=settings.MINIO_PUBLIC_BASE_URL.rstrip("/"),
+                aws_access_key_id=settings.MINIO_ACCESS_KEY,
+                aws_secret_access_key=settings.MINIO_SECRET_KEY,
+                config=Config(signature_version='s3v4', s3={'addressing_style': 'path'}),
+                region_name='us-east-1'
+            )
+        return self._public_client
+
 
 # Singleton instance
 storage_service = StorageService()
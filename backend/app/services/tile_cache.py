@@ -7,15 +7,21 @@ re-downloading large files for overlapping parcels.
 The cache is shared across all tenants since PNOA data is public.
 """
 
+import functools
 import logging
 import os
-from typing import Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
 from pathlib import Path
 from urllib.parse import urlparse
 
-import requests
+from botocore.exceptions import ClientError
+from redis import Redis
+from redis.exceptions import LockError, RedisError
+from redis.lock import Lock
 
 from app.config import settings
+from app.services.downloads import parallel_download
 from app.services.storage import storage_service
 
 logger = logging.getLogger(__name__)
@@ -23,6 +29,29 @@ logger = logging.getLogger(__name__)
 # Separate bucket for source tiles (raw LAZ files from PNOA)
 SOURCE_TILES_BUCKET = "lidar-source-tiles"
 
+# Cache uploads run here so the pipeline can start on a freshly downloaded
+# tile while it is copied to MinIO
+_upload_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tile-cache-upload")
+
+# Source tiles are hundreds of MB: large parts keep the part count (and
+# MinIO's per-part overhead) low
+CACHE_UPLOAD_PART_BYTES = 64 << 20  # 64 MiB
+CACHE_UPLOAD_CONCURRENCY = 4
+
+# Redis counters behind the cache stats (shared by all workers)
+CACHE_HITS_KEY = "tilecache:hits"
+CACHE_MISSES_KEY = "tilecache:misses"
+# Cached tile key -> size, and the running byte total, updated as uploads
+# land so stats never list the bucket
+CACHE_TILES_KEY = "tilecache:tiles"
+CACHE_BYTES_KEY = "tilecache:bytes"
+
+# Per-tile lock so concurrent misses on one tile download it only once.
+# Held until the cache upload finishes; expires if its holder dies.
+TILE_LOCK_TTL = settings.WORKER_TIMEOUT
+# Past this, a waiting worker downloads the tile itself
+TILE_LOCK_WAIT = 600
+
 
 class TileCacheService:
     """
@@ -33,6 +62,9 @@ class TileCacheService:
     
     def __init__(self):
         self.bucket = SOURCE_TILES_BUCKET
+        self._pending_uploads: List[Future] = []
+        # Connects lazily; a short timeout keeps counters from stalling a job
+        self._redis = Redis.from_url(settings.REDIS_URL, socket_timeout=2, socket_connect_timeout=2)
         self._ensure_bucket_exists()
     
     def _ensure_bucket_exists(self):
@@ -85,14 +117,19 @@ class TileCacheService:
     def download_and_cache_tile(
         self,
         source_url: str,
-        work_dir: str
+        work_dir: str,
+        lock: Optional[Lock] = None
     ) -> Tuple[str, str]:
         """
         Download a tile from source and cache it in MinIO.
         
+        The MinIO upload runs in the background; call `flush_uploads()`
+        before deleting `work_dir`.
+        
         Args:
             source_url: URL to download from (PNOA/CNIG)
             work_dir: Local working directory
+            lock: Tile lock to release once the tile is in the cache
             
         Returns:
             Tuple of (local_file_path, tile_name)
@@ -102,25 +139,38 @@ class TileCacheService:
         minio_key = f"{tile_name}.laz"
 
         logger.info(f"Downloading tile from: {source_url}")
-        response = requests.get(source_url, stream=True, timeout=600)
-        response.raise_for_status()
-
-        file_size = 0
-        with open(local_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-                file_size += len(chunk)
+        file_size = parallel_download(source_url, local_path, timeout=600)
 
         logger.info(f"Downloaded {file_size / 1024 / 1024:.1f} MB to {local_path}")
         logger.info(f"Uploading to MinIO cache: {self.bucket}/{minio_key}")
-        storage_service.upload_file(
+        upload = _upload_pool.submit(
+            _upload_to_cache,
+            lock,
+            functools.partial(self._record_cached, minio_key, file_size),
             bucket=self.bucket,
             key=minio_key,
             file_path=local_path,
-            content_type="application/octet-stream"
+            content_type="application/octet-stream",
+            part_size=CACHE_UPLOAD_PART_BYTES,
+            max_concurrency=CACHE_UPLOAD_CONCURRENCY,
         )
+        self._pending_uploads.append(upload)
         return local_path, tile_name
     
+    def flush_uploads(self) -> None:
+        """
+        Wait for background cache uploads to finish.
+        
+        A failed upload only means the next request downloads the tile
+        again, so errors are logged rather than raised.
+        """
+        while self._pending_uploads:
+            future = self._pending_uploads.pop()
+            try:
+                future.result()
+            except Exception as e:
+                logger.warning(f"Tile cache upload failed: {e}")
+    
     def get_or_download_tile(
         self,
         source_url: str,
@@ -140,24 +190,115 @@ class TileCacheService:
         """
         tile_name = self._extract_tile_name(source_url)
         
-        # Check cache first
-        minio_key = f"{tile_name}.laz"
-        if storage_service.file_exists_in_bucket(self.bucket, minio_key):
-            logger.info(f"Cache HIT for tile: {tile_name}")
-            return self.get_tile_local_path(tile_name, work_dir)
-        local_path, _ = self.download_and_cache_tile(source_url, work_dir)
+        local_path = self._fetch_cached(tile_name, work_dir)
+        if local_path:
+            return local_path
+        
+        lock = self._acquire_tile_lock(tile_name)
+        try:
+            if lock is not None:
+                # Another worker may have cached the tile while we waited
+                local_path = self._fetch_cached(tile_name, work_dir)
+                if local_path:
+                    return local_path
+            logger.info(f"Cache MISS for tile: {tile_name}")
+            self._count(CACHE_MISSES_KEY)
+            local_path, _ = self.download_and_cache_tile(source_url, work_dir, lock=lock)
+            # Released by the cache upload from here on
+            lock = None
+            return local_path
+        finally:
+            if lock is not None:
+                _release_lock(lock)
+    
+    def _fetch_cached(self, tile_name: str, work_dir: str) -> Optional[str]:
+        """Download a tile from the cache, or return None if it isn't cached."""
+        # Fetch directly: a 404 is the miss, so a hit costs no separate
+        # existence check
+        try:
+            local_path = self.get_tile_local_path(tile_name, work_dir)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code', '') not in ('404', 'NoSuchKey'):
+                raise
+            return None
+        logger.info(f"Cache HIT for tile: {tile_name}")
+        self._count(CACHE_HITS_KEY)
         return local_path
     
+    def _acquire_tile_lock(self, tile_name: str) -> Optional[Lock]:
+        """
+        Take the per-tile download lock, waiting up to TILE_LOCK_WAIT.
+        
+        Returns None when Redis is unavailable or the wait times out; the
+        caller then downloads without the lock.
+        """
+        # thread_local=False: the upload thread releases it, not this one
+        lock = self._redis.lock(
+            f"tilecache:lock:{tile_name}",
+            timeout=TILE_LOCK_TTL,
+            blocking_timeout=TILE_LOCK_WAIT,
+            thread_local=False,
+        )
+        try:
+            if lock.acquire():
+                return lock
+            logger.warning(f"Timed out waiting for tile lock: {tile_name}")
+        except RedisError as e:
+            logger.warning(f"Tile lock unavailable for {tile_name}: {e}")
+        return None
+    
+    def _count(self, key: str) -> None:
+        try:
+            self._redis.incr(key)
+        except RedisError as e:
+            logger.warning(f"Tile cache counter update failed: {e}")
+    
+    def _record_cached(self, minio_key: str, size: int) -> None:
+        # HSETNX keeps a re-upload of the same tile from counting twice
+        try:
+            if self._redis.hsetnx(CACHE_TILES_KEY, minio_key, size):
+                self._redis.incrby(CACHE_BYTES_KEY, size)
+        except RedisError as e:
+            logger.warning(f"Tile cache size update failed: {e}")
+    
     def get_cache_stats(self) -> dict:
-        """Get statistics about the tile cache."""
+        """Get statistics about the tile cache (Redis reads only)."""
+        count = total_size = hits = misses = None
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.hlen(CACHE_TILES_KEY)
+            pipe.mget(CACHE_BYTES_KEY, CACHE_HITS_KEY, CACHE_MISSES_KEY)
+            count, values = pipe.execute()
+            total_size, hits, misses = (int(v or 0) for v in values)
+        except RedisError as e:
+            logger.warning(f"Tile cache counters unavailable: {e}")
         return {
-            "total_cached_tiles": None,
-            "total_size_mb": None,
-            "total_accesses": None,
-            "cache_hits_saved_downloads": None,
+            "total_cached_tiles": count,
+            "total_size_mb": round(total_size / 1024 / 1024, 1) if total_size is not None else None,
+            "total_accesses": hits + misses if hits is not None else None,
+            "cache_hits_saved_downloads": hits,
             "mode": "minio-only-no-sql",
         }
 
 
+def _upload_to_cache(lock: Optional[Lock], on_cached: Callable[[], None], **upload_kwargs) -> None:
+    # Release inside the task, not in a done-callback: flush_uploads() can
+    # return before callbacks run, and the work horse would exit holding
+    # the lock until its TTL
+    try:
+        storage_service.upload_file(**upload_kwargs)
+        on_cached()
+    finally:
+        if lock is not None:
+            _release_lock(lock)
+
+
+def _release_lock(lock: Lock) -> None:
+    try:
+        lock.release()
+    except (LockError, RedisError) as e:
+        logger.warning(f"Failed to release tile lock: {e}")
+
+
 # Singleton instance
 tile_cache = TileCacheService()
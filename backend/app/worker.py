@@ -5,7 +5,7 @@ This module runs as a separate process to handle heavy LiDAR processing jobs.
 It connects to Redis and processes jobs from the 'lidar-processing' queue.
 
 Usage:
-    # Run worker
+    # Run worker (WORKER_CONCURRENCY processes)
     python -m app.worker
 
     # Or via rq command
@@ -13,6 +13,10 @@ Usage:
 """
 
 import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
 import socket
 import sys
 import uuid
@@ -36,6 +40,16 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# GDAL options for reading remote NDVI rasters via /vsicurl/. Applied once,
+# before any job runs, so every job (and every GDAL user in the process)
+# sees the same settings; values already in the environment win.
+GDAL_VSICURL_CONFIG = {
+    "GDAL_HTTP_MAX_RETRY": "3",
+    "GDAL_HTTP_RETRY_DELAY": "1",
+    "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+    "VSI_CACHE": "TRUE",
+}
+
 
 def _extract_job_context(job: Job) -> Tuple[Optional[str], Optional[str]]:
     """
@@ -160,14 +174,12 @@ def create_redis_connection() -> Redis:
     return Redis.from_url(settings.REDIS_URL)
 
 
-def run_worker():
-    """Start the RQ worker."""
-    logger.info("Starting LIDAR processing worker...")
-    logger.info(f"Redis URL: {settings.REDIS_URL}")
-    logger.info(f"Queue: {settings.WORKER_QUEUE_NAME}")
-
+def _run_single_worker(index: int) -> None:
+    """Run one RQ worker; only the first one runs the scheduler."""
+    # Forked children inherit run_worker's blocked SIGTERM; RQ installs its
+    # own handler in work(), until then the default action is fine.
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGTERM})
     redis_conn = create_redis_connection()
-    reconcile_failed_jobs(redis_conn, settings.WORKER_QUEUE_NAME)
 
     # Worker name must be unique per container instance: pod hostname stays
     # the same across in-place container restarts, which would collide with
@@ -185,8 +197,66 @@ def run_worker():
             work_horse_killed_handler=_work_horse_killed_handler,
         )
 
-        logger.info("Worker ready. Waiting for jobs...")
-        worker.work(with_scheduler=True)
+        logger.info("Worker %s ready. Waiting for jobs...", worker_name)
+        worker.work(with_scheduler=index == 0)
+
+
+def run_worker():
+    """Start WORKER_CONCURRENCY RQ workers."""
+    concurrency = max(1, settings.WORKER_CONCURRENCY)
+    logger.info("Starting LIDAR processing worker...")
+    logger.info(f"Redis URL: {settings.REDIS_URL}")
+    logger.info(f"Queue: {settings.WORKER_QUEUE_NAME}")
+    logger.info(f"Concurrency: {concurrency}")
+
+    for key, value in GDAL_VSICURL_CONFIG.items():
+        os.environ.setdefault(key, value)
+
+    reconcile_failed_jobs(create_redis_connection(), settings.WORKER_QUEUE_NAME)
+
+    if concurrency == 1:
+        _run_single_worker(0)
+        return
+
+    processes = [
+        multiprocessing.Process(target=_run_single_worker, args=(i,), name=f"lidar-worker-{i}")
+        for i in range(concurrency)
+    ]
+    stopping = False
+
+    def _signal_alive(signum):
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signum)
+
+    # The container runtime only signals PID 1: pass SIGTERM on so every
+    # worker does a warm shutdown. SIGINT from a terminal already reaches
+    # the whole process group. SIGTERM stays blocked until the handler is
+    # in place, so a stop during startup is forwarded, not fatal to PID 1.
+    def _forward_sigterm(signum, frame):
+        nonlocal stopping
+        stopping = True
+        _signal_alive(signum)
+
+    signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGTERM})
+    for process in processes:
+        process.start()
+    signal.signal(signal.SIGTERM, _forward_sigterm)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGTERM})
+
+    # Any worker exiting outside a shutdown (OOM kill, crash) would leave the
+    # pod running below capacity: stop the others and exit so it restarts.
+    multiprocessing.connection.wait([process.sentinel for process in processes])
+    if not stopping:
+        dead = [process.name for process in processes if not process.is_alive()]
+        logger.error("Worker process exited unexpectedly (%s); stopping the rest", ", ".join(dead))
+        _signal_alive(signal.SIGTERM)
+
+    for process in processes:
+        process.join()
+    if not stopping or any(process.exitcode for process in processes):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,89 @@
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from app.middleware import auth
+
+SECRET = "test-secret"
+ISSUER = "https://keycloak.example/realms/nekazari"
+
+
+@pytest.fixture
+def decode_calls(monkeypatch):
+    """Verify with a shared HS256 secret and count signature checks."""
+    calls = []
+    real_decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return real_decode(*args, **kwargs)
+
+    async def fake_signing_key(token):
+        return SECRET
+
+    monkeypatch.setattr(auth, "JWT_ALGORITHM", "HS256")
+    monkeypatch.setattr(auth, "JWT_ISSUER", ISSUER)
+    monkeypatch.setattr(auth, "_get_signing_key", fake_signing_key)
+    monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+    auth._token_cache.clear()
+    yield calls
+    auth._token_cache.clear()
+
+
+def _token(exp_in: float, secret: str = SECRET) -> str:
+    payload = {"sub": "user-1", "iss": ISSUER, "exp": int(time.time() + exp_in)}
+    return jwt.encode(payload, secret, algorithm="HS256")
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_skips_signature_check(decode_calls):
+    token = _token(exp_in=3600)
+
+    first = await auth.verify_token(token)
+    second = await auth.verify_token(token)
+
+    assert first == second
+    assert first["sub"] == "user-1"
+    assert len(decode_calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_entry_near_expiry_is_reverified(decode_calls):
+    token = _token(exp_in=auth.TOKEN_EXP_MARGIN - 10)
+
+    await auth.verify_token(token)
+    await auth.verify_token(token)
+
+    assert len(decode_calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_token_behind_cached_entry_raises_401(decode_calls):
+    token = _token(exp_in=-1)
+    # Verified while still valid, then expired before the cache TTL ran out
+    auth._token_cache[token] = jwt.decode(
+        token, SECRET, algorithms=["HS256"], options={"verify_exp": False}
+    )
+    decode_calls.clear()
+
+    with pytest.raises(HTTPException) as exc:
+        await auth.verify_token(token)
+
+    assert exc.value.status_code == 401
+    assert exc.value.detail == "Token has expired"
+    assert decode_calls == [token]
+
+
+@pytest.mark.asyncio
+async def test_invalid_token_is_never_cached(decode_calls):
+    token = _token(exp_in=3600, secret="other-secret")
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc:
+            await auth.verify_token(token)
+        assert exc.value.status_code == 401
+
+    assert token not in auth._token_cache
+    assert len(decode_calls) == 2
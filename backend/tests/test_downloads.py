@@ -0,0 +1,120 @@
+import io
+
+import pytest
+import requests
+
+from app.services import downloads
+
+DATA = bytes(range(256)) * 40  # 10240 bytes
+
+
+class _FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None, url="http://tiles.example/t.laz"):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.url = url
+        self.raw = io.BytesIO(body)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _FakeSession:
+    """Serves DATA; `head_status`, `range_status` and `truncate` shape the answers."""
+
+    def __init__(self, head_status=200, range_status=206, truncate=0):
+        self.head_status = head_status
+        self.range_status = range_status
+        self.truncate = truncate
+        self.range_requests = []
+
+    def head(self, url, allow_redirects=True, timeout=None):
+        headers = {"Content-Length": str(len(DATA)), "Accept-Ranges": "bytes"}
+        return _FakeResponse(self.head_status, headers=headers, url=url)
+
+    def get(self, url, headers=None, stream=True, timeout=None):
+        if headers and "Range" in headers:
+            self.range_requests.append(headers["Range"])
+            if self.range_status != 206:
+                return _FakeResponse(self.range_status, DATA)
+            start, end = (int(v) for v in headers["Range"].split("=")[1].split("-"))
+            return _FakeResponse(206, DATA[start:end + 1 - self.truncate])
+        return _FakeResponse(200, DATA)
+
+
+@pytest.fixture
+def fake_session(monkeypatch):
+    def _install(**kwargs):
+        session = _FakeSession(**kwargs)
+        monkeypatch.setattr(downloads, "_session", session)
+        monkeypatch.setattr(downloads, "RANGE_DOWNLOAD_MIN_BYTES", 0)
+        return session
+
+    return _install
+
+
+def test_split_ranges_covers_size_with_inclusive_bounds():
+    assert downloads._split_ranges(40, 16) == [(0, 15), (16, 31), (32, 39)]
+    assert downloads._split_ranges(32, 16) == [(0, 15), (16, 31)]
+
+
+def test_parallel_download_assembles_ranges(tmp_path, fake_session):
+    session = fake_session()
+    dst = tmp_path / "tile.laz"
+
+    assert downloads.parallel_download("http://tiles.example/t.laz", str(dst), part_bytes=4096) == len(DATA)
+    assert dst.read_bytes() == DATA
+    assert len(session.range_requests) == 3
+
+
+def test_parallel_download_falls_back_when_range_is_ignored(tmp_path, fake_session):
+    fake_session(range_status=200)
+    dst = tmp_path / "tile.laz"
+
+    assert downloads.parallel_download("http://tiles.example/t.laz", str(dst), part_bytes=4096) == len(DATA)
+    assert dst.read_bytes() == DATA
+
+
+def test_parallel_download_falls_back_when_head_is_rejected(tmp_path, fake_session):
+    session = fake_session(head_status=405)
+    dst = tmp_path / "tile.laz"
+
+    assert downloads.parallel_download("http://tiles.example/t.laz", str(dst), part_bytes=4096) == len(DATA)
+    assert dst.read_bytes() == DATA
+    assert session.range_requests == []
+
+
+def test_parallel_download_rejects_short_reads(tmp_path, fake_session):
+    fake_session(truncate=1)
+
+    with pytest.raises(IOError, match="Short read"):
+        downloads.parallel_download("http://tiles.example/t.laz", str(tmp_path / "tile.laz"), part_bytes=4096)
+
+
+@pytest.mark.parametrize("err", [downloads.errno.EOPNOTSUPP, downloads.errno.EINVAL])
+def test_preallocate_falls_back_when_unsupported(tmp_path, monkeypatch, err):
+    def fail(fd, offset, size):
+        raise OSError(err, "unsupported")
+
+    monkeypatch.setattr(downloads.os, "posix_fallocate", fail, raising=False)
+    path = tmp_path / "f"
+    with open(path, "wb") as f:
+        downloads._preallocate(f.fileno(), 100)
+    assert path.stat().st_size == 100
+
+
+def test_preallocate_raises_when_disk_is_full(tmp_path, monkeypatch):
+    def fail(fd, offset, size):
+        raise OSError(downloads.errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(downloads.os, "posix_fallocate", fail, raising=False)
+    with open(tmp_path / "f", "wb") as f, pytest.raises(OSError) as exc:
+        downloads._preallocate(f.fileno(), 100)
+    assert exc.value.errno == downloads.errno.ENOSPC
@@ -1,4 +1,4 @@
-"""Tests for LiDAR pipeline CRS handling and geobounds validation."""
+"""Tests for LiDAR pipeline CRS handling, geobounds validation and tree tops."""
 import pytest
 from pathlib import Path
 
@@ -63,3 +63,42 @@ class TestGeoBoundsValidator:
     def test_rejects_moscow(self, validator):
         """Should reject coordinates in Moscow, Russia (outside EU+UK+buffer)."""
         assert validator.validate_lon_lat(37.6173, 55.7558) is False
+
+
+class TestFindTreeTops:
+    """Tree-top detection on synthetic canopy height models."""
+
+    @pytest.fixture
+    def chm(self):
+        import numpy as np
+
+        chm = np.zeros((40, 40))
+        chm[9:12, 9:12] = 5.0
+        chm[10, 10] = 10.0  # single crown
+        chm[24:27, 24:27] = 8.0  # flat-topped crown
+        chm[10, 28] = chm[10, 31] = 6.0  # equal tops 3 px apart
+        chm[1, 20] = 9.0  # inside the excluded border
+        chm[30, 8] = 1.5  # below threshold
+        return chm
+
+    def test_pins_expected_tops(self, chm):
+        from app.services.lidar_pipeline import _find_tree_tops
+
+        tops = _find_tree_tops(chm, min_distance=3, threshold=2.0)
+
+        assert [tuple(t) for t in tops] == [(10, 10), (24, 24), (10, 28)]
+
+    def test_matches_peak_local_max(self):
+        import numpy as np
+        from scipy import ndimage
+        feature = pytest.importorskip("skimage.feature")
+        from app.services.lidar_pipeline import _find_tree_tops
+
+        rng = np.random.default_rng(0)
+        chm = ndimage.gaussian_filter(rng.random((96, 96)), sigma=2) * 40
+
+        tops = _find_tree_tops(chm, min_distance=3, threshold=18.0)
+        expected = feature.peak_local_max(chm, min_distance=3, threshold_abs=18.0)
+
+        assert len(tops) > 0
+        assert sorted(map(tuple, tops)) == sorted(map(tuple, expected))
@@ -1,5 +1,6 @@
 from app.services.orion_client import OrionLDClient
 
+import httpx
 import pytest
 
 
@@ -29,3 +30,132 @@ async def test_create_processing_job_builds_expected_entity(monkeypatch):
     assert captured["json"]["type"] == "DataProcessingJob"
     assert captured["json"]["refAgriParcel"]["object"] == "urn:ngsi-ld:AgriParcel:parcel-1"
 
+
+
+@pytest.mark.asyncio
+async def test_list_jobs_filters_server_side_and_reads_count(monkeypatch):
+    captured = {}
+
+    async def fake_send(self, method, endpoint, json_data=None):
+        captured["endpoint"] = endpoint
+        return httpx.Response(
+            200,
+            json=[{"id": "urn:ngsi-ld:DataProcessingJob:job-1"}],
+            headers={"NGSILD-Results-Count": "42"},
+        )
+
+    monkeypatch.setattr(OrionLDClient, "_send", fake_send)
+    client = OrionLDClient(tenant_id="tenant-a")
+    jobs, total = await client.list_jobs(limit=20, offset=0, status="completed", parcel_id="parcel-1")
+
+    assert len(jobs) == 1
+    assert total == 42
+    assert 'status=="completed"' in captured["endpoint"]
+    assert 'refAgriParcel=="urn:ngsi-ld:AgriParcel:parcel-1"' in captured["endpoint"]
+    assert "count=true" in captured["endpoint"]
+
+
+def test_create_trees_batch_sync_posts_one_batch(monkeypatch):
+    calls = []
+
+    def fake_request_sync(self, method, endpoint, json_data=None):
+        calls.append((method, endpoint, json_data))
+        return None
+
+    monkeypatch.setattr(OrionLDClient, "_request_sync", fake_request_sync)
+    client = OrionLDClient(tenant_id="tenant-a")
+    trees = [
+        {
+            "id": f"tree_{i}",
+            "location": {"type": "Point", "coordinates": [-1.6, 42.8]},
+            "height": 5.0,
+            "crown_diameter": 3.0,
+            "crown_area": 7.1,
+        }
+        for i in (1, 2, 3)
+    ]
+
+    assert client.create_trees_batch_sync("job-1", "parcel-1", trees) == 3
+    assert len(calls) == 1
+    method, endpoint, body = calls[0]
+    assert (method, endpoint) == ("POST", "/ngsi-ld/v1/entityOperations/create")
+    assert [e["id"] for e in body] == [f"urn:ngsi-ld:AgriTree:job-1:tree_{i}" for i in (1, 2, 3)]
+    assert body[0]["refAgriParcel"]["object"] == "urn:ngsi-ld:AgriParcel:parcel-1"
+
+
+def test_create_trees_batch_sync_chunks_and_counts_partial_success(monkeypatch):
+    batches = []
+
+    def fake_request_sync(self, method, endpoint, json_data=None):
+        batches.append(json_data)
+        if len(batches) == 2:
+            # 207 Multi-Status for the second batch
+            return {
+                "success": [e["id"] for e in json_data[1:]],
+                "errors": [{"entityId": json_data[0]["id"], "error": {"status": 409}}],
+            }
+        return [e["id"] for e in json_data]
+
+    monkeypatch.setattr(OrionLDClient, "_request_sync", fake_request_sync)
+    monkeypatch.setattr("app.services.orion_client.TREE_BATCH_SIZE", 2)
+    client = OrionLDClient(tenant_id="tenant-a")
+    trees = [
+        {
+            "id": f"tree_{i}",
+            "location": {"type": "Point", "coordinates": [-1.6, 42.8]},
+            "height": 5.0,
+            "crown_diameter": 3.0,
+            "crown_area": 7.1,
+        }
+        for i in range(5)
+    ]
+
+    assert client.create_trees_batch_sync("job-1", "parcel-1", trees) == 4
+    assert [len(b) for b in batches] == [2, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_delete_asset_trees_uses_batch_delete(monkeypatch):
+    calls = []
+
+    async def fake_request(self, method, endpoint, json_data=None):
+        calls.append((method, endpoint, json_data))
+        if method == "GET":
+            return [{"id": "urn:ngsi-ld:AgriTree:job-1:tree_1"}, {"id": "urn:ngsi-ld:AgriTree:job-1:tree_2"}]
+        return None
+
+    monkeypatch.setattr(OrionLDClient, "_request", fake_request)
+    client = OrionLDClient(tenant_id="tenant-a")
+
+    assert await client.delete_asset_trees("urn:ngsi-ld:DigitalAsset:job-1") == 2
+    assert 'refDigitalAsset=="urn:ngsi-ld:DigitalAsset:job-1"' in calls[0][1]
+    assert "attrs=refDigitalAsset" in calls[0][1]
+    assert calls[1] == (
+        "POST",
+        "/ngsi-ld/v1/entityOperations/delete",
+        ["urn:ngsi-ld:AgriTree:job-1:tree_1", "urn:ngsi-ld:AgriTree:job-1:tree_2"],
+    )
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_delete_asset_trees_counts_207_partial_success(monkeypatch):
+    calls = []
+    ids = [f"urn:ngsi-ld:AgriTree:job-1:tree_{i}" for i in range(3)]
+
+    async def fake_send(self, method, endpoint, json_data=None):
+        calls.append((method, endpoint))
+        if method == "GET":
+            return httpx.Response(200, json=[{"id": i} for i in ids])
+        return httpx.Response(
+            207,
+            json={"success": ids[1:], "errors": [{"entityId": ids[0], "error": {"status": 500}}]},
+        )
+
+    monkeypatch.setattr(OrionLDClient, "_send", fake_send)
+    monkeypatch.setattr("app.services.orion_client.TREE_QUERY_LIMIT", 3)
+    client = OrionLDClient(tenant_id="tenant-a")
+
+    assert await client.delete_asset_trees("urn:ngsi-ld:DigitalAsset:job-1") == 2
+    # A full page with rejections is not re-read (the rejected tree would loop)
+    assert [method for method, _ in calls] == ["GET", "POST"]
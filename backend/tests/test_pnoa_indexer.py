@@ -1,34 +1,88 @@
 import json
+import os
+
+import pytest
 
 from app.config import settings
+from app.services import pnoa_indexer
 from app.services.pnoa_indexer import PNOAIndexer
 
+INSIDE_WKT = "POLYGON((0.2 0.2,0.8 0.2,0.8 0.8,0.2 0.8,0.2 0.2))"
+
 
-def test_find_coverage_intersects_geometry(tmp_path, monkeypatch):
-    coverage = {
+def _coverage(tile_name="tile-1", offset=0):
+    ring = [[offset, 0], [offset + 1, 0], [offset + 1, 1], [offset, 1], [offset, 0]]
+    return {
         "type": "FeatureCollection",
         "features": [
             {
                 "type": "Feature",
                 "properties": {
-                    "id": "tile-1",
-                    "tile_name": "tile-1",
+                    "id": tile_name,
+                    "tile_name": tile_name,
                     "source": "PNOA",
-                    "laz_url": "https://example.com/tile-1.laz",
-                },
-                "geometry": {
-                    "type": "Polygon",
-                    "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+                    "laz_url": f"https://example.com/{tile_name}.laz",
+                    "huso": 30,
                 },
+                "geometry": {"type": "Polygon", "coordinates": [ring]},
             }
         ],
     }
+
+
+@pytest.fixture
+def coverage_path(tmp_path, monkeypatch):
+    """Point the indexer at a one-tile catalog over (0,0)-(1,1), with empty caches."""
     geojson_path = tmp_path / "coverage.geojson"
-    geojson_path.write_text(json.dumps(coverage), encoding="utf-8")
+    geojson_path.write_text(json.dumps(_coverage()), encoding="utf-8")
     monkeypatch.setattr(settings, "COVERAGE_INDEX_GEOJSON_PATH", str(geojson_path))
+    monkeypatch.setattr(pnoa_indexer, "_catalog_cache", {})
+    pnoa_indexer._memoized_matches.cache_clear()
+    return geojson_path
+
+
+def test_find_coverage_intersects_geometry(coverage_path):
+    tiles = PNOAIndexer().find_coverage(INSIDE_WKT)
 
-    indexer = PNOAIndexer()
-    tiles = indexer.find_coverage("POLYGON((0.2 0.2,0.8 0.2,0.8 0.8,0.2 0.8,0.2 0.2))")
     assert len(tiles) == 1
     assert tiles[0]["tile_name"] == "tile-1"
 
+
+def test_has_coverage_accepts_parsed_geometry_and_reuses_catalog(coverage_path):
+    from shapely.geometry import box
+
+    indexer = PNOAIndexer()
+    assert indexer.has_coverage(box(0.5, 0.5, 2, 2))
+    assert not indexer.has_coverage("POLYGON((5 5,6 5,6 6,5 6,5 5))")
+    assert PNOAIndexer()._tiles is indexer._tiles
+
+
+def test_find_coverage_memoizes_wkt_lookups(coverage_path):
+    first = PNOAIndexer().find_coverage(INSIDE_WKT)
+    first[0]["tile_name"] = "mutated"
+    second = PNOAIndexer().find_coverage(INSIDE_WKT)
+
+    assert second[0]["tile_name"] == "tile-1"
+    assert pnoa_indexer._memoized_matches.cache_info().hits == 1
+
+
+def test_catalog_reloads_when_file_mtime_changes(coverage_path):
+    assert PNOAIndexer().find_coverage(INSIDE_WKT)[0]["tile_name"] == "tile-1"
+
+    # Rebuilt catalog moves coverage off the parcel; bump mtime explicitly
+    # so the test does not depend on filesystem timestamp resolution
+    mtime_ns = os.stat(coverage_path).st_mtime_ns
+    coverage_path.write_text(json.dumps(_coverage("tile-2", offset=5)), encoding="utf-8")
+    os.utime(coverage_path, ns=(mtime_ns + 10**9, mtime_ns + 10**9))
+
+    assert PNOAIndexer().find_coverage(INSIDE_WKT) == []
+    assert PNOAIndexer().find_coverage("POINT(5.5 0.5)")[0]["tile_name"] == "tile-2"
+
+
+def test_tile_metadata_is_served_separately(coverage_path):
+    indexer = PNOAIndexer()
+    tiles = indexer.find_coverage(INSIDE_WKT)
+
+    assert "metadata" not in tiles[0]
+    assert indexer.get_tile_metadata("tile-1")["huso"] == 30
+    assert indexer.get_tile_metadata("missing") is None
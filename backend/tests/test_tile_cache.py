@@ -0,0 +1,93 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+
+class _FakeLock:
+    def __init__(self):
+        self.released = False
+
+    def release(self):
+        self.released = True
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+        self.values = {}
+
+    def hsetnx(self, name, key, value):
+        fields = self.hashes.setdefault(name, {})
+        if key in fields:
+            return 0
+        fields[key] = value
+        return 1
+
+    def incrby(self, name, amount):
+        self.values[name] = self.values.get(name, 0) + amount
+
+
+class _FakeStorage:
+    def __init__(self, upload_error=None):
+        self.upload_error = upload_error
+        self.uploads = []
+
+    def ensure_bucket(self, bucket):
+        pass
+
+    def upload_file(self, **kwargs):
+        self.uploads.append(kwargs)
+        if self.upload_error:
+            raise self.upload_error
+
+
+@pytest.fixture
+def tile_cache_module(monkeypatch):
+    # The real storage module connects to MinIO at import time
+    fake_storage_module = types.ModuleType("app.services.storage")
+    fake_storage_module.storage_service = _FakeStorage()
+    monkeypatch.setitem(sys.modules, "app.services.storage", fake_storage_module)
+    monkeypatch.delitem(sys.modules, "app.services.tile_cache", raising=False)
+    module = importlib.import_module("app.services.tile_cache")
+
+    def fake_download(url, dst, timeout=600):
+        with open(dst, "wb") as f:
+            f.write(b"laz")
+        return 3
+
+    monkeypatch.setattr(module, "parallel_download", fake_download)
+    return module
+
+
+@pytest.mark.parametrize("upload_error", [None, RuntimeError("MinIO down")])
+def test_tile_lock_released_once_upload_finishes(tmp_path, monkeypatch, tile_cache_module, upload_error):
+    storage = _FakeStorage(upload_error=upload_error)
+    monkeypatch.setattr(tile_cache_module, "storage_service", storage)
+    redis = _FakeRedis()
+    monkeypatch.setattr(tile_cache_module.tile_cache, "_redis", redis)
+    lock = _FakeLock()
+
+    local_path, tile_name = tile_cache_module.tile_cache.download_and_cache_tile(
+        "https://tiles.example/PNOA_2023_NAV_0001.laz", str(tmp_path), lock=lock
+    )
+    tile_cache_module.tile_cache.flush_uploads()
+
+    assert tile_name == "PNOA_2023_NAV_0001"
+    assert storage.uploads[0]["key"] == "PNOA_2023_NAV_0001.laz"
+    assert lock.released
+    # Only a completed upload counts towards the cached totals
+    cached = {} if upload_error else {"PNOA_2023_NAV_0001.laz": 3}
+    assert redis.hashes.get(tile_cache_module.CACHE_TILES_KEY, {}) == cached
+    assert redis.values.get(tile_cache_module.CACHE_BYTES_KEY, 0) == sum(cached.values())
+
+
+def test_repeat_upload_of_a_tile_is_counted_once(tile_cache_module, monkeypatch):
+    redis = _FakeRedis()
+    monkeypatch.setattr(tile_cache_module.tile_cache, "_redis", redis)
+
+    for _ in range(2):
+        tile_cache_module.tile_cache._record_cached("PNOA_2023_NAV_0001.laz", 3)
+
+    assert redis.values[tile_cache_module.CACHE_BYTES_KEY] == 3
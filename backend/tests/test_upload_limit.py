@@ -0,0 +1,32 @@
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.middleware.upload_limit import UploadSizeLimitMiddleware
+
+
+async def _echo_size(request):
+    body = await request.body()
+    return PlainTextResponse(str(len(body)))
+
+
+def _client(max_body_bytes: int) -> TestClient:
+    app = Starlette(routes=[Route("/upload", _echo_size, methods=["POST"]), Route("/other", _echo_size, methods=["POST"])])
+    app.add_middleware(UploadSizeLimitMiddleware, max_body_bytes=max_body_bytes, paths=["/upload"])
+    return TestClient(app)
+
+
+def test_rejects_declared_oversized_upload_before_reading_body():
+    client = _client(max_body_bytes=10)
+
+    response = client.post("/upload", content=b"x" * 11)
+    assert response.status_code == 413
+    assert response.json() == {"detail": "File too large."}
+
+
+def test_passes_small_uploads_and_other_paths():
+    client = _client(max_body_bytes=10)
+
+    assert client.post("/upload", content=b"x" * 10).text == "10"
+    assert client.post("/other", content=b"x" * 11).text == "11"
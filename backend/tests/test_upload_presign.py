@@ -0,0 +1,167 @@
+import importlib
+import sys
+import types
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+TENANT = "tenant-a"
+
+
+class _FakeOrion:
+    def __init__(self):
+        self.jobs = {}
+
+    async def get_job(self, entity_id):
+        from app.services.orion_client import OrionRequestError
+
+        if entity_id not in self.jobs:
+            raise OrionRequestError(404, "NotFound")
+        return self.jobs[entity_id]
+
+
+class _FakeStorage:
+    def __init__(self, object_size=None):
+        self.object_size = object_size
+        self.stat_error = None
+        self.upload_buckets = []
+        self.posts = []
+        self.deleted_prefixes = []
+
+    def ensure_upload_bucket(self, bucket):
+        self.upload_buckets.append(bucket)
+
+    def presigned_post(self, bucket, key, max_bytes, expires_in=1800):
+        self.posts.append({"bucket": bucket, "key": key, "max_bytes": max_bytes})
+        return {"url": f"https://minio.example/{bucket}", "fields": {"key": key, "policy": "p"}}
+
+    def get_object_size(self, bucket, key):
+        if self.stat_error:
+            raise self.stat_error
+        return self.object_size
+
+    def delete_prefix(self, prefix, bucket=None):
+        self.deleted_prefixes.append((bucket, prefix))
+        return 1
+
+
+@pytest.fixture
+def api(monkeypatch):
+    # The real storage module connects to MinIO at import time
+    storage = _FakeStorage()
+    fake_storage_module = types.ModuleType("app.services.storage")
+    fake_storage_module.storage_service = storage
+    monkeypatch.setitem(sys.modules, "app.services.storage", fake_storage_module)
+
+    main = importlib.import_module("app.main")
+    lidar = importlib.import_module("app.api.lidar")
+    from app.middleware.auth import get_tenant_id, require_auth
+
+    queued = []
+    orion = _FakeOrion()
+
+    async def fake_queue_upload_job(**kwargs):
+        queued.append(kwargs)
+
+    monkeypatch.setattr(lidar, "_queue_upload_job", fake_queue_upload_job)
+    monkeypatch.setattr(lidar, "get_orion_client", lambda tenant_id: orion)
+    monkeypatch.setattr(lidar.settings, "MINIO_PUBLIC_BASE_URL", "https://minio.example")
+    monkeypatch.setattr(main.limiter, "enabled", False)
+    monkeypatch.setitem(main.app.dependency_overrides, require_auth, lambda: {"sub": "user-1"})
+    monkeypatch.setitem(main.app.dependency_overrides, get_tenant_id, lambda: TENANT)
+
+    return types.SimpleNamespace(
+        client=TestClient(main.app), storage=storage, queued=queued, orion=orion, lidar=lidar
+    )
+
+
+def _finalize(api, upload_id):
+    return api.client.post(
+        "/api/lidar/upload/finalize",
+        json={"upload_id": upload_id, "filename": "flight.laz", "parcel_id": "urn:ngsi-ld:AgriParcel:1"},
+    )
+
+
+def test_presign_signs_size_capped_post(api):
+    response = api.client.post("/api/lidar/upload/presign", json={"filename": "flight.LAZ"})
+
+    assert response.status_code == 200
+    body = response.json()
+    key = f"user_uploads/{TENANT}/{body['upload_id']}/upload.laz"
+    assert body["upload_url"] == "https://minio.example/lidar-source-tiles"
+    assert body["fields"]["key"] == key
+    assert api.storage.upload_buckets == ["lidar-source-tiles"]
+    assert api.storage.posts == [
+        {"bucket": "lidar-source-tiles", "key": key, "max_bytes": api.lidar.UPLOAD_MAX_BYTES}
+    ]
+
+
+def test_presign_requires_public_storage_url(api, monkeypatch):
+    monkeypatch.setattr(api.lidar.settings, "MINIO_PUBLIC_BASE_URL", None)
+
+    response = api.client.post("/api/lidar/upload/presign", json={"filename": "flight.laz"})
+
+    assert response.status_code == 501
+    assert api.storage.posts == []
+
+
+def test_presign_rejects_unsupported_extension(api):
+    response = api.client.post("/api/lidar/upload/presign", json={"filename": "flight.zip"})
+
+    assert response.status_code == 400
+    assert api.storage.posts == []
+
+
+def test_finalize_queues_uploaded_object(api):
+    api.storage.object_size = 1024
+    upload_id = str(uuid4())
+
+    response = _finalize(api, upload_id)
+
+    assert response.status_code == 202
+    assert response.json()["job_id"] == upload_id
+    assert api.queued[0]["s3_key"] == f"user_uploads/{TENANT}/{upload_id}/upload.laz"
+    assert api.queued[0]["config_payload"]["source"] == "user_upload"
+
+
+def test_finalize_rejects_missing_upload(api):
+    response = _finalize(api, str(uuid4()))
+
+    assert response.status_code == 404
+    assert api.queued == []
+
+
+def test_finalize_deletes_oversized_upload(api):
+    api.storage.object_size = api.lidar.UPLOAD_MAX_BYTES + 1
+    upload_id = str(uuid4())
+
+    response = _finalize(api, upload_id)
+
+    assert response.status_code == 413
+    assert api.storage.deleted_prefixes == [("lidar-source-tiles", f"user_uploads/{TENANT}/{upload_id}/")]
+    assert api.queued == []
+
+
+def test_finalize_retry_returns_existing_job(api):
+    upload_id = str(uuid4())
+    api.orion.jobs[f"urn:ngsi-ld:DataProcessingJob:{upload_id}"] = {
+        "status": {"type": "Property", "value": "processing"}
+    }
+
+    response = _finalize(api, upload_id)
+
+    assert response.status_code == 202
+    assert response.json()["status"] == "processing"
+    assert api.queued == []
+
+
+def test_finalize_reports_storage_outage_as_503(api):
+    from botocore.exceptions import ClientError
+
+    api.storage.stat_error = ClientError({"Error": {"Code": "503"}}, "HeadObject")
+
+    response = _finalize(api, str(uuid4()))
+
+    assert response.status_code == 503
+    assert api.queued == []
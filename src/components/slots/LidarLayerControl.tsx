@@ -212,18 +212,12 @@ const LidarLayerControl: React.FC = () => {
         throw new Error(t('errorMissingCrs'));
       }
 
-      const formData = new FormData();
-      formData.append('file', file);
-      formData.append('parcel_id', selectedEntityId || 'unknown');
-      if (selectedEntityGeometry) {
-        formData.append('geometry_wkt', selectedEntityGeometry);
-      }
-      formData.append('config', JSON.stringify(processingConfig));
-      if (manualCrs.trim()) {
-        formData.append('source_crs', manualCrs.trim());
-      }
-
-      const uploadResponse = await lidarApi.uploadFile(formData);
+      const uploadResponse = await lidarApi.uploadFileDirect(file, {
+        parcel_id: selectedEntityId || 'unknown',
+        geometry_wkt: selectedEntityGeometry || undefined,
+        config: processingConfig,
+        source_crs: manualCrs.trim() || undefined,
+      });
 
       // Poll until job completes (same flow as PNOA download)
       const finalStatus = await lidarApi.pollJobStatus(
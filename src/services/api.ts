@@ -28,6 +28,22 @@ export interface ProcessResponse {
     message: string;
 }
 
+export interface UploadPresignResponse {
+    upload_id: string;
+    upload_url: string;
+    fields: Record<string, string>;
+    expires_in: number;
+}
+
+export interface UploadFinalizeRequest {
+    upload_id: string;
+    filename: string;
+    parcel_id: string;
+    geometry_wkt?: string;
+    config: ProcessingConfig;
+    source_crs?: string;
+}
+
 export interface JobStatus {
     job_id: string;
     status: 'pending' | 'queued' | 'processing' | 'completed' | 'failed' | 'cancelled';
@@ -77,6 +93,13 @@ export interface DetectedTree {
 // API Client Class
 // ============================================================================
 
+export class ApiError extends Error {
+    constructor(message: string, public readonly status: number) {
+        super(message);
+        this.name = 'ApiError';
+    }
+}
+
 class LidarApiClient {
     private baseUrl: string;
 
@@ -113,7 +136,7 @@ class LidarApiClient {
 
         if (!response.ok) {
             const errorData = await response.json().catch(() => ({}));
-            throw new Error(errorData.detail || `API error: ${response.status}`);
+            throw new ApiError(errorData.detail || `API error: ${response.status}`, response.status);
         }
 
         return response.json();
@@ -277,6 +300,58 @@ class LidarApiClient {
         return response.json();
     }
 
+    /**
+     * Upload a LiDAR file straight to storage, then queue it for processing.
+     * The file never passes through the API; storage enforces the size cap.
+     * Falls back to the proxied /upload when direct uploads are not configured.
+     */
+    async uploadFileDirect(file: File, request: Omit<UploadFinalizeRequest, 'upload_id' | 'filename'>): Promise<ProcessResponse> {
+        let presign: UploadPresignResponse;
+        try {
+            presign = await this.request('/upload/presign', {
+                method: 'POST',
+                body: JSON.stringify({ filename: file.name }),
+            });
+        } catch (error) {
+            if (!(error instanceof ApiError && error.status === 501)) {
+                throw error;
+            }
+            const formData = new FormData();
+            formData.append('file', file);
+            formData.append('parcel_id', request.parcel_id);
+            if (request.geometry_wkt) {
+                formData.append('geometry_wkt', request.geometry_wkt);
+            }
+            formData.append('config', JSON.stringify(request.config));
+            if (request.source_crs) {
+                formData.append('source_crs', request.source_crs);
+            }
+            return this.uploadFile(formData);
+        }
+
+        // Policy fields must precede the file part
+        const formData = new FormData();
+        Object.entries(presign.fields).forEach(([name, value]) => formData.append(name, value));
+        formData.append('file', file);
+
+        const storageResponse = await fetch(presign.upload_url, {
+            method: 'POST',
+            body: formData,
+        });
+        if (!storageResponse.ok) {
+            throw new Error(`Upload error: ${storageResponse.status}`);
+        }
+
+        return this.request('/upload/finalize', {
+            method: 'POST',
+            body: JSON.stringify({
+                ...request,
+                upload_id: presign.upload_id,
+                filename: file.name,
+            }),
+        });
+    }
+
     // --------------------------------------------------------------------------
     // Jobs List
     // --------------------------------------------------------------------------